@@ -0,0 +1,19 @@
+from umbi.binary.bitvectors import bitvector_to_bytes, bytes_to_bitvector
+
+
+def test_bytes_to_bitvector_lsb_first():
+    assert bytes_to_bitvector(b"\x05") == [True, False, True, False, False, False, False, False]
+    assert bytes_to_bitvector(b"") == []
+
+
+def test_bitvector_to_bytes_padding():
+    assert bitvector_to_bytes([]) == b""
+    assert bitvector_to_bytes([True, False, True]) == b"\x05"
+    assert bitvector_to_bytes([False] * 8 + [True]) == b"\x00\x01"
+
+
+def test_bitvector_to_bytes_and_back():
+    input = [True, False, False, True, True, False, True, True, False, True]
+    output = bytes_to_bitvector(bitvector_to_bytes(input))
+    assert output[: len(input)] == input
+    assert not any(output[len(input) :])
@@ -0,0 +1,45 @@
+from fractions import Fraction
+
+import numpy as np
+
+from umbi.binary import (
+    bytes_to_common_value,
+    bytes_to_vector,
+    common_value_to_bytes,
+    csr_has_uniform_chunks,
+    vector_to_bytes,
+)
+from umbi.binary.rationals import rational_to_bytes
+from umbi.datatypes import CommonType, Interval, csr_to_ranges
+
+
+def test_bytes_to_vector_rationals():
+    values = [Fraction(1, 3), Fraction(-7, 2), Fraction(0), Fraction(2**62, 2**63 - 1)]
+    data = b"".join(rational_to_bytes(value, term_size=8) for value in values)
+    assert bytes_to_vector(data, CommonType.RATIONAL) == values
+    chunks = [data[i : i + 16] for i in range(0, len(data), 16)]
+    assert [bytes_to_common_value(chunk, CommonType.RATIONAL) for chunk in chunks] == values
+
+
+def test_bytes_to_vector_intervals():
+    values = [Interval(0.25, 0.5), Interval(-1.0, 1e300)]
+    data = b"".join(common_value_to_bytes(value, CommonType.DOUBLE_INTERVAL) for value in values)
+    assert bytes_to_vector(data, CommonType.DOUBLE_INTERVAL) == values
+    values = [Interval(Fraction(1, 3), Fraction(1, 2)), Interval(Fraction(-5, 7), Fraction(9))]
+    data = b"".join(rational_to_bytes(bound, term_size=8) for value in values for bound in (value.left, value.right))
+    assert bytes_to_vector(data, CommonType.RATIONAL_INTERVAL) == values
+
+
+def test_csr_has_uniform_chunks():
+    assert csr_has_uniform_chunks(np.array([0, 8, 16, 24], dtype=np.uint64), CommonType.DOUBLE)
+    assert not csr_has_uniform_chunks(np.array([0, 8, 24], dtype=np.uint64), CommonType.DOUBLE)
+    assert csr_has_uniform_chunks(np.array([0, 16, 32], dtype=np.uint64), CommonType.RATIONAL)
+    assert not csr_has_uniform_chunks(np.array([0, 1, 2], dtype=np.uint64), CommonType.STRING)
+
+
+def test_bytes_to_vector_strings():
+    for values in (["a", "", "bc"], ["žluť", "", "kůň"]):
+        data, csr = vector_to_bytes(values, CommonType.STRING)
+        assert csr is not None
+        assert bytes_to_vector(data, CommonType.STRING, csr_to_ranges(csr)) == values
+        assert bytes_to_vector(memoryview(data), CommonType.STRING, csr_to_ranges(np.array(csr))) == values
@@ -0,0 +1,56 @@
+from fractions import Fraction
+
+from umbi.binary import bytes_to_vector, vector_to_bytes
+from umbi.binary.sequences import bytes_into_chunk_ranges
+from umbi.binary.structs import fixed_size_structs_unpack, structs_unpack
+from umbi.datatypes import CommonType, StructAttribute, StructPadding, StructType, csr_to_ranges
+
+
+def fixed_size_struct() -> StructType:
+    return StructType(
+        alignment=1,
+        fields=[
+            StructAttribute(name="b", type=CommonType.BOOLEAN, size=1),
+            StructAttribute(name="x", type=CommonType.INT, size=5),
+            StructPadding(padding=3),
+            StructAttribute(name="y", type=CommonType.UINT, size=13),
+            StructAttribute(name="d", type=CommonType.DOUBLE, size=64),
+            StructPadding(padding=2),
+        ],
+    )
+
+
+def test_fixed_size_structs_unpack():
+    value_type = fixed_size_struct()
+    values = [
+        {"b": True, "x": -16, "y": 8191, "d": 0.5},
+        {"b": False, "x": 15, "y": 0, "d": -1e300},
+        {"b": True, "x": -1, "y": 1234, "d": 0.0},
+    ]
+    data, csr = vector_to_bytes(values, value_type)
+    ranges = csr_to_ranges(csr)
+    assert fixed_size_structs_unpack(data, ranges, value_type) == values
+    assert structs_unpack(bytes_into_chunk_ranges(data, ranges), value_type) == values
+    assert bytes_to_vector(data, value_type, ranges) == values
+
+
+def test_fixed_size_structs_unpack_variable_size():
+    value_type = StructType(alignment=1)
+    value_type.add_attribute("s", CommonType.STRING)
+    data, csr = vector_to_bytes([{"s": "a"}, {"s": "bc"}], value_type)
+    assert fixed_size_structs_unpack(data, csr_to_ranges(csr), value_type) is None
+
+
+def test_structs_unpack_variable_size():
+    value_type = StructType(alignment=1)
+    value_type.add_attribute("b", CommonType.BOOLEAN)
+    value_type.add_attribute("s", CommonType.STRING)
+    value_type.add_attribute("x", CommonType.INT)
+    value_type.add_attribute("r", CommonType.RATIONAL)
+    value_type.pad_to_byte(None)
+    values = [
+        {"b": True, "s": "žluť", "x": -(2**63), "r": Fraction(-1, 3)},
+        {"b": False, "s": "a", "x": 7, "r": Fraction(2**70, 3)},
+    ]
+    data, csr = vector_to_bytes(values, value_type)
+    assert structs_unpack(bytes_into_chunk_ranges(data, csr_to_ranges(csr)), value_type) == values
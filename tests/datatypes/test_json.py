@@ -0,0 +1,49 @@
+import math
+
+import pytest
+
+import umbi.datatypes.json
+from umbi.datatypes import json_to_string, string_to_json, utf8_to_json
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_parser(request, monkeypatch):
+    """Run a test both with orjson, if it is installed, and with the standard library alone."""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(umbi.datatypes.json, "orjson", None)
+    return request.param
+
+
+def test_string_to_json_integers_exceeding_64_bits(json_parser):
+    assert string_to_json('{"x": -9300000000000000000}') == {"x": -9300000000000000000}
+    assert string_to_json('{"x": 18446744073709551616}') == {"x": 18446744073709551616}
+    assert string_to_json('{"x": -9223372036854775808}') == {"x": -9223372036854775808}
+
+
+def test_string_to_json_non_finite_floats(json_parser):
+    values = string_to_json("[NaN, Infinity, -Infinity]")
+    assert isinstance(values, list)
+    assert math.isnan(values[0])
+    assert values[1:] == [math.inf, -math.inf]
+    assert string_to_json("[1e400, -1e400]") == [math.inf, -math.inf]
+
+
+def test_string_to_json_lone_surrogates(json_parser):
+    assert string_to_json('["\\ud800"]') == ["\ud800"]
+
+
+def test_string_to_json_invalid(json_parser):
+    with pytest.raises(ValueError):
+        string_to_json("[1,")
+
+
+def test_utf8_to_json(json_parser):
+    assert utf8_to_json('{"x": [-9300000000000000000, 1.5, "é"]}'.encode()) == {"x": [-9300000000000000000, 1.5, "é"]}
+    assert math.isinf(utf8_to_json(memoryview(b"[-Infinity]"))[0])
+    assert utf8_to_json(b'[1e400, "\\ud800"]') == [math.inf, "\ud800"]
+
+
+def test_json_to_string_non_finite_floats():
+    assert json_to_string([math.nan, math.inf], indent=None) == "[NaN, Infinity]"
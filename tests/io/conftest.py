@@ -0,0 +1,23 @@
+import sys
+
+import pytest
+
+import umbi.io.tar
+
+
+@pytest.fixture
+def fake_pigz(tmp_path_factory, monkeypatch):
+    """Make a stand-in for pigz, which compresses its input with the gzip module, the one that is used."""
+    pigz = tmp_path_factory.mktemp("bin") / "pigz"
+    pigz.write_text(
+        f"#!{sys.executable}\nimport gzip, sys\nsys.stdout.buffer.write(gzip.compress(sys.stdin.buffer.read()))\n"
+    )
+    pigz.chmod(0o755)
+    monkeypatch.setattr(umbi.io.tar, "pigz_executable", lambda: str(pigz))
+    return pigz
+
+
+@pytest.fixture
+def no_pigz(monkeypatch):
+    """Make pigz unavailable, so that gzip compression falls back to tarfile (or a thread pool)."""
+    monkeypatch.setattr(umbi.io.tar, "pigz_executable", lambda: None)
@@ -0,0 +1,164 @@
+import gzip
+import mmap
+import tarfile
+
+import pytest
+
+import umbi.io.tar
+from umbi.io.tar import TarReader, TarWriter
+
+FILENAME_DATA = {
+    "index.json": b'{"a": 1}',
+    "empty.bin": b"",
+    "large.bin": bytes(range(256)) * 4099,
+}
+
+
+def read_all(tarpath) -> dict[str, bytes]:
+    return {filename: bytes(data) for filename, data in TarReader(str(tarpath)).filename_data.items()}
+
+
+@pytest.mark.parametrize("compression", ["", "gz", "bz2", "xz"])
+def test_tar_write_and_read(tmp_path, no_pigz, compression):
+    tarpath = tmp_path / "test.tar"
+    TarWriter.tar_write(str(tarpath), FILENAME_DATA, compression=compression)
+    assert TarReader.is_compressed(str(tarpath)) == (compression != "")
+    assert read_all(tarpath) == FILENAME_DATA
+
+
+@pytest.mark.parametrize("compression", ["", "gz", "bz2", "xz"])
+def test_tar_stream_and_read(tmp_path, no_pigz, compression):
+    tarpath = tmp_path / "test.tar"
+    writer = TarWriter(str(tarpath), compression=compression)
+    for filename, data in FILENAME_DATA.items():
+        writer.add_file(filename, data)
+    writer.write(str(tarpath))
+    assert not writer.is_streaming
+    assert read_all(tarpath) == FILENAME_DATA
+
+
+def test_tar_write_and_stream_pigz(tmp_path, fake_pigz, monkeypatch):
+    monkeypatch.setattr(umbi.io.tar, "PARALLEL_GZIP_MIN_SIZE", 0)
+    tarpath = tmp_path / "test.tar"
+    TarWriter.tar_write(str(tarpath), FILENAME_DATA, compression="gz")
+    assert read_all(tarpath) == FILENAME_DATA
+    writer = TarWriter(str(tarpath), compression="gz")
+    assert writer.pigz_process is not None
+    for filename, data in FILENAME_DATA.items():
+        writer.add_file(filename, data)
+    writer.write(str(tarpath))
+    assert read_all(tarpath) == FILENAME_DATA
+
+
+def test_tar_write_small_without_pigz(tmp_path, fake_pigz, monkeypatch):
+    def tar_write_pigz(*args):
+        raise AssertionError("pigz must not be started for small tarballs")
+
+    monkeypatch.setattr(TarWriter, "tar_write_pigz", tar_write_pigz)
+    tarpath = tmp_path / "test.tar"
+    TarWriter.tar_write(str(tarpath), FILENAME_DATA, compression="gz")
+    assert read_all(tarpath) == FILENAME_DATA
+
+
+def test_tar_write_and_stream_zstd(tmp_path):
+    pytest.importorskip("zstandard")
+    tarpath = tmp_path / "test.tar"
+    TarWriter.tar_write(str(tarpath), FILENAME_DATA, compression="zst")
+    assert read_all(tarpath) == FILENAME_DATA
+    writer = TarWriter(str(tarpath), compression="zst")
+    for filename, data in FILENAME_DATA.items():
+        writer.add_file(filename, data)
+    writer.write(str(tarpath))
+    assert read_all(tarpath) == FILENAME_DATA
+
+
+def test_tar_write_failure_keeps_existing_file(tmp_path, no_pigz, monkeypatch):
+    tarpath = tmp_path / "keep.umb"
+    tarpath.write_bytes(b"precious")
+    monkeypatch.setattr(umbi.io.tar, "zstandard", None)
+    with pytest.raises(ImportError):
+        TarWriter.tar_write(str(tarpath), FILENAME_DATA, compression="zst")
+    with pytest.raises(TypeError):
+        TarWriter.tar_write(str(tarpath), {"broken.bin": None}, compression="gz")  # type: ignore
+    assert tarpath.read_bytes() == b"precious"
+    assert list(tmp_path.iterdir()) == [tarpath]
+
+
+@pytest.mark.parametrize("compression", ["", "gz"])
+def test_tar_stream_failure_keeps_existing_file(tmp_path, no_pigz, compression):
+    tarpath = tmp_path / "keep.umb"
+    tarpath.write_bytes(b"precious")
+    writer = TarWriter(str(tarpath), compression=compression)
+    writer.add_file("index.json", FILENAME_DATA["index.json"])
+    assert tarpath.read_bytes() == b"precious"
+    with pytest.raises(TypeError):
+        writer.add_file("broken.bin", None)  # type: ignore
+    assert not writer.is_streaming
+    assert tarpath.read_bytes() == b"precious"
+    assert list(tmp_path.iterdir()) == [tarpath]
+
+
+def test_tar_stream_replaces_existing_file(tmp_path, no_pigz):
+    tarpath = tmp_path / "keep.umb"
+    tarpath.write_bytes(b"precious")
+    writer = TarWriter(str(tarpath), compression="gz")
+    for filename, data in FILENAME_DATA.items():
+        writer.add_file(filename, data)
+    writer.write(str(tarpath))
+    assert read_all(tarpath) == FILENAME_DATA
+    assert list(tmp_path.iterdir()) == [tarpath]
+
+
+def test_tar_write_exceeding_ustar_limits(tmp_path, no_pigz, monkeypatch):
+    tarpath = tmp_path / "test.tar"
+    with pytest.raises(ValueError, match="filenames are limited"):
+        TarWriter.tar_write(str(tarpath), {"x" * 101: b""})
+    writer = TarWriter(str(tarpath))
+    with pytest.raises(ValueError, match="filenames are limited"):
+        writer.add_file("ž" * 51, b"")
+    monkeypatch.setattr(umbi.io.tar, "USTAR_MAX_SIZE", 1000)
+    with pytest.raises(ValueError, match="files are limited"):
+        TarWriter.tar_write(str(tarpath), FILENAME_DATA)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_tar_write_gzip_parallel(tmp_path, monkeypatch):
+    monkeypatch.setattr(umbi.io.tar, "PARALLEL_GZIP_CHUNK_SIZE", 1 << 12)
+    tarpath = tmp_path / "test.tar"
+    TarWriter.tar_write_gzip_parallel(str(tarpath), FILENAME_DATA, max_workers=2)
+    assert TarReader.is_compressed(str(tarpath))
+    assert read_all(tarpath) == FILENAME_DATA
+
+
+def test_tar_read_gzip_multi_member(tmp_path):
+    tarpath = tmp_path / "test.tar"
+    TarWriter.tar_write(str(tarpath), FILENAME_DATA, compression="")
+    tar_data = tarpath.read_bytes()
+    tarpath.write_bytes(gzip.compress(tar_data[:1000]) + gzip.compress(tar_data[1000:]))
+    assert read_all(tarpath) == FILENAME_DATA
+
+
+def test_tar_read_empty_file(tmp_path):
+    tarpath = tmp_path / "test.tar"
+    tarpath.write_bytes(b"")
+    with pytest.raises(tarfile.ReadError):
+        TarReader(str(tarpath))
+
+
+def test_tar_read_mmap(tmp_path):
+    tarpath = tmp_path / "test.tar"
+    TarWriter.tar_write(str(tarpath), FILENAME_DATA, compression="")
+    with TarReader(str(tarpath)) as reader:
+        filename_data = dict(reader.filename_data)
+        assert all(isinstance(data, memoryview) and isinstance(data.obj, mmap.mmap) for data in filename_data.values())
+        assert {filename: bytes(data) for filename, data in filename_data.items()} == FILENAME_DATA
+    with pytest.raises(ValueError, match="released"):
+        bytes(filename_data["large.bin"])
+
+
+def test_tar_write_zstd_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(umbi.io.tar, "zstandard", None)
+    tarpath = tmp_path / "test.tar"
+    with pytest.raises(ImportError):
+        TarWriter(str(tarpath), compression="zst")
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,173 @@
+import concurrent.futures
+import json
+import time
+from fractions import Fraction
+
+import pytest
+
+import umbi.ats
+import umbi.io
+import umbi.io.tar
+import umbi.io.umb
+from umbi.datatypes import CommonType, StructType
+from umbi.io.umb_ats_converter import umb_valuations_to_ats_valuations
+
+
+def chain_ats(num_states: int) -> umbi.ats.ExplicitAts:
+    """A chain of states, each of which moves forward or stays, with state valuations and annotations."""
+    ats = umbi.ats.ExplicitAts()
+    ats.time = umbi.ats.TimeType.DISCRETE
+    ats.num_players = 1
+    ats.num_states = num_states
+    ats.set_initial_states([0])
+    ats.action_strings = ["stay", "move"]
+    ats.num_actions = len(ats.action_strings)
+    ats.state_to_choice = []
+    ats.choice_to_branch = []
+    ats.choice_to_action = []
+    ats.branch_to_target = []
+    ats.branch_probabilities = []
+    for state in range(num_states):
+        ats.state_to_choice.append(len(ats.choice_to_action))
+        ats.choice_to_action.append(0)
+        ats.choice_to_branch.append(len(ats.branch_to_target))
+        ats.branch_to_target.append(state)
+        ats.branch_probabilities.append(1)
+        ats.choice_to_action.append(1)
+        ats.choice_to_branch.append(len(ats.branch_to_target))
+        ats.branch_to_target.extend([min(state + 1, num_states - 1), state])
+        ats.branch_probabilities.extend([Fraction(2, 3), Fraction(1, 3)])
+    ats.state_to_choice.append(len(ats.choice_to_action))
+    ats.choice_to_branch.append(len(ats.branch_to_target))
+    ats.num_choices = len(ats.choice_to_action)
+    ats.num_branches = len(ats.branch_to_target)
+    variable = ats.state_valuations.add_variable("position")
+    for state in range(num_states):
+        ats.state_valuations.set_item_valuation(state, {variable: state})
+    ats.add_ap_annotation(
+        umbi.ats.AtomicPropositionAnnotation(
+            name="end", state_to_value=[state == num_states - 1 for state in range(num_states)]
+        )
+    )
+    ats.add_reward_annotation(
+        umbi.ats.RewardAnnotation(name="cost", choice_to_value=[choice % 2 for choice in range(ats.num_choices)])
+    )
+    return ats
+
+
+@pytest.mark.parametrize("compression", ["", "gz"])
+def test_write_lazy_umb_to_its_own_path(tmp_path, no_pigz, compression):
+    umbpath = str(tmp_path / "chain.umb")
+    umbi.io.write_ats(chain_ats(10), umbpath)
+    umbi.io.write_umb(umbi.io.read_umb(umbpath), umbpath, compression=compression)
+    expected = umbi.io.read_umb(umbpath)
+    for stream in [False, True]:
+        lazy = umbi.io.read_umb(umbpath, eager=False)
+        umbi.io.write_umb(lazy, umbpath, stream=stream, compression=compression)
+        assert umbi.io.read_umb(umbpath) == expected
+    assert list(tmp_path.iterdir()) == [tmp_path / "chain.umb"]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_write_umb_failure_keeps_existing_file(tmp_path, no_pigz, stream):
+    umbpath = tmp_path / "chain.umb"
+    umbi.io.write_ats(chain_ats(10), str(umbpath))
+    contents = umbpath.read_bytes()
+    umb = umbi.io.read_umb(str(umbpath), eager=False)
+    umb.state_is_initial = None
+    with pytest.raises(ValueError):
+        umbi.io.write_umb(umb, str(umbpath), stream=stream)
+    assert umbpath.read_bytes() == contents
+    assert list(tmp_path.iterdir()) == [umbpath]
+
+
+def test_modify_read_state_valuations(tmp_path, no_pigz):
+    umbpath = str(tmp_path / "chain.umb")
+    umbi.io.write_ats(chain_ats(10), umbpath)
+    umb = umbi.io.read_umb(umbpath)
+    assert isinstance(umb.state_to_valuation, list)
+    umb.state_to_valuation[3]["position"] = 7
+    assert json.loads(json.dumps(umb.state_to_valuation))[3] == {"position": 7}
+    umbi.io.write_umb(umb, umbpath)
+    assert umbi.io.read_umb(umbpath).state_to_valuation[3] == {"position": 7}
+
+
+def test_umb_valuations_missing_variable():
+    valuation_type = StructType(alignment=1, fields=[])
+    valuation_type.add_attribute(name="x", type=CommonType.INT)
+    valuations = umb_valuations_to_ats_valuations(valuation_type, [{"x": 1}, {"x": 2}])
+    assert valuations.get_variable_valuations(valuations.variables[0]).values == [1, 2]
+    with pytest.raises(KeyError):
+        umb_valuations_to_ats_valuations(valuation_type, [{"x": 1}, {}])
+
+
+def write_chain_umb(umbpath: str, **kwargs) -> umbi.io.ExplicitUmb:
+    umbi.io.write_ats(chain_ats(10), umbpath)
+    umb = umbi.io.read_umb(umbpath)
+    umbi.io.write_umb(umb, umbpath, **kwargs)
+    return umb
+
+
+@pytest.mark.parametrize("compression", ["", "gz", "bz2", "xz"])
+def test_read_umb_lazy_equals_eager(tmp_path, no_pigz, compression):
+    umbpath = str(tmp_path / "chain.umb")
+    write_chain_umb(umbpath, compression=compression)
+    eager = umbi.io.read_umb(umbpath)
+    lazy = umbi.io.read_umb(umbpath, eager=False)
+    assert isinstance(lazy, umbi.io.LazyExplicitUmb)
+    assert lazy.branch_to_target == eager.branch_to_target
+    assert lazy.state_to_valuation == eager.state_to_valuation
+    assert lazy == eager
+    assert lazy.load_all() == eager
+
+
+def test_read_umb_lazy_from_threads(tmp_path, no_pigz, monkeypatch):
+    umbpath = str(tmp_path / "chain.umb")
+    eager = write_chain_umb(umbpath)
+    lazy = umbi.io.read_umb(umbpath, eager=False)
+    assert "chain.umb" in repr(lazy)
+    assert lazy.cache == {}
+    read_field = lazy.reader.read_field
+
+    def slow_read_field(*args):
+        time.sleep(0.01)
+        return read_field(*args)
+
+    monkeypatch.setattr(lazy.reader, "read_field", slow_read_field)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        valuations = list(executor.map(lambda _: lazy.state_to_valuation, range(4)))
+    assert valuations == [eager.state_to_valuation] * 4
+
+
+def test_read_umb_thread_pool(tmp_path, no_pigz, monkeypatch):
+    umbpath = str(tmp_path / "chain.umb")
+    write_chain_umb(umbpath)
+    monkeypatch.setattr(umbi.io.umb, "READ_MAX_WORKERS", 1)
+    sequential = umbi.io.read_umb(umbpath)
+    monkeypatch.setattr(umbi.io.umb, "READ_MAX_WORKERS", 4)
+    monkeypatch.setattr(umbi.io.umb.os, "cpu_count", lambda: 4)
+    assert umbi.io.read_umb(umbpath) == sequential
+    assert umbi.io.read_ats(umbpath) == chain_ats(10)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_write_umb_zstd(tmp_path, stream):
+    pytest.importorskip("zstandard")
+    umbpath = str(tmp_path / "chain.umb")
+    umb = write_chain_umb(umbpath, stream=stream, compression="zst")
+    assert umbi.io.read_umb(umbpath) == umb
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_write_umb_pigz(tmp_path, fake_pigz, monkeypatch, stream):
+    monkeypatch.setattr(umbi.io.tar, "PARALLEL_GZIP_MIN_SIZE", 0)
+    umbpath = str(tmp_path / "chain.umb")
+    umb = write_chain_umb(umbpath, stream=stream)
+    assert umbi.io.read_umb(umbpath) == umb
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_write_umb_without_pigz(tmp_path, no_pigz, stream):
+    umbpath = str(tmp_path / "chain.umb")
+    umb = write_chain_umb(umbpath, stream=stream)
+    assert umbi.io.read_umb(umbpath) == umb
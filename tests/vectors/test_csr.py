@@ -1,7 +1,10 @@
-from umbi.umbi.datatypes.vector import (
+import numpy as np
+
+from umbi.datatypes.vector import (
     is_vector_csr,
     is_vector_ranges,
     csr_to_ranges,
+    csr_to_uniform_stride,
     ranges_to_csr,
 )
 
@@ -42,6 +45,12 @@ def test_csr_to_ranges_basic():
     assert csr_to_ranges(input) == expected
 
 
+def test_csr_to_ranges_array():
+    input = np.array([0, 2, 5, 7], dtype=np.uint64)
+    expected = [[0, 2], [2, 5], [5, 7]]
+    assert csr_to_ranges(input).tolist() == expected
+
+
 def test_ranges_to_csr_basic():
     input = [(0, 2), (2, 5), (5, 7)]
     expected = [0, 2, 5, 7]
@@ -58,3 +67,10 @@ def test_ranges_to_csr_and_back():
     input = [(0, 4), (4, 8), (8, 10)]
     output = csr_to_ranges(ranges_to_csr(input))
     assert input == output
+
+
+def test_csr_to_uniform_stride():
+    assert csr_to_uniform_stride([0, 3, 6, 9]) == 3
+    assert csr_to_uniform_stride(np.array([0, 8], dtype=np.uint64)) == 8
+    assert csr_to_uniform_stride([0, 3, 7]) is None
+    assert csr_to_uniform_stride([0]) is None
@@ -3,6 +3,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Iterable
 
+import numpy as np
+
 from umbi.datatypes import (
     CommonType,
     Numeric,
@@ -80,7 +82,8 @@ class ExplicitAts:
         for field_name in self.__dataclass_fields__:
             if getattr(self, field_name) != getattr(other, field_name):
                 equal = False
-                if not debug:
+                # formatting the differing fields can be expensive, only do so if the output is shown
+                if not debug or not logger.isEnabledFor(logging.DEBUG):
                     break
                 logger.debug(f"ExplicitAts.__eq__: field {field_name} differs")
                 logger.debug(f"  self: {getattr(self, field_name)}")
@@ -93,15 +96,18 @@ class ExplicitAts:
     @property
     def initial_states(self) -> list[int]:
         """Get the list of the initial states."""
-        return [i for i, is_initial in enumerate(self.state_is_initial) if is_initial]
+        return np.flatnonzero(np.asarray(self.state_is_initial, dtype=bool)).tolist()
 
     def set_initial_states(self, initial_states: list[int]):
         """Set the initial states."""
-        self.state_is_initial = [False] * self.num_states
-        for s in initial_states:
-            if s >= self.num_states:
-                raise ValueError(f"Invalid initial state {s}, must be < {self.num_states}.")
-            self.state_is_initial[s] = True
+        indices = np.asarray(initial_states, dtype=np.int64)
+        invalid = indices[indices >= self.num_states]
+        if len(invalid) > 0:
+            raise ValueError(f"Invalid initial state {invalid[0]}, must be < {self.num_states}.")
+        # all states are marked in a single scatter instead of one by one
+        state_is_initial = np.zeros(self.num_states, dtype=bool)
+        state_is_initial[indices] = True
+        self.state_is_initial = state_is_initial.tolist()
         self.num_initial_states = len(initial_states)
 
     @property
@@ -109,7 +115,7 @@ class ExplicitAts:
         """Get the list of the markovian states."""
         if self.state_is_markovian is None:
             raise ValueError("state_is_markovian is not set")
-        return [i for i, is_markovian in enumerate(self.state_is_markovian) if is_markovian]
+        return np.flatnonzero(np.asarray(self.state_is_markovian, dtype=bool)).tolist()
 
     def get_branch_probability(self, branch_id: int) -> Numeric:
         if self.branch_probabilities is not None:
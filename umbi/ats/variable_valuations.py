@@ -133,6 +133,10 @@ class VariableValuations:
         self.ensure_capacity(item + 1)
         self._values[item] = value
 
+    def set_values(self, values: list) -> None:
+        """Sets the valuations of all items at once."""
+        self._values = list(values)
+
     def sync_domain(self) -> None:
         """Sets the variable domain from the valuations."""
         self._variable.sync_domain(self._values)
@@ -238,6 +242,11 @@ class ItemValuations:
             variable_valuation = self.get_variable_valuations(variable)
             variable_valuation.set_item_value(item, value)
 
+    def set_variable_valuations(self, variable: Variable, values: list) -> None:
+        """Sets the valuations of a given variable for all items at once. Increases capacity if needed."""
+        self.get_variable_valuations(variable).set_values(values)
+        self.ensure_capacity(len(values))
+
     def remove_item(self, item: int) -> None:
         """Removes the valuations for a given item index."""
         raise NotImplementedError
@@ -2,12 +2,27 @@
 umbi.binary: Utilities for (de)serializing basic types.
 """
 
+from .bitvectors import bytes_to_bool_array
 from .common import bytes_to_common_value, common_value_to_bytes
-from .sequences import bytes_to_vector, vector_to_bytes
+from .sequences import (
+    bytes_to_csr,
+    bytes_to_vector,
+    csr_has_uniform_chunks,
+    csr_to_buffer,
+    csr_to_bytes,
+    vector_to_buffer,
+    vector_to_bytes,
+)
 
 __all__ = [
     "common_value_to_bytes",
     "bytes_to_common_value",
     "bytes_to_vector",
     "vector_to_bytes",
+    "csr_to_bytes",
+    "vector_to_buffer",
+    "csr_to_buffer",
+    "bytes_to_bool_array",
+    "bytes_to_csr",
+    "csr_has_uniform_chunks",
 ]
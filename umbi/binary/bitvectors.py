@@ -2,21 +2,24 @@
 Utilities for (de)serializing booleans and bitvectors.
 """
 
+import numpy as np
 from bitstring import BitArray
 
 
-def bytes_to_bitvector(bytestring: bytes) -> list[bool]:
+def bytes_to_bool_array(bytestring: bytes | memoryview) -> np.ndarray:
+    """Convert a bytestring representing a bitvector into an array of booleans."""
+    bits = np.unpackbits(np.frombuffer(bytestring, dtype=np.uint8), bitorder="little")
+    return bits.view(bool)
+
+
+def bytes_to_bitvector(bytestring: bytes | memoryview) -> list[bool]:
     """Convert a bytestring representing a bitvector into a list of booleans."""
-    return [(byte >> bit) & 1 == 1 for byte in bytestring for bit in range(8)]
+    return bytes_to_bool_array(bytestring).tolist()
 
 
 def bitvector_to_bytes(bitvector: list[bool]) -> bytes:
     """Convert a list of booleans representing a bitvector into a bytestring."""
-    byte_array = bytearray()
-    for i in range(0, len(bitvector), 8):
-        byte = sum((1 << j) for j in range(8) if i + j < len(bitvector) and bitvector[i + j])
-        byte_array.append(byte)
-    return bytes(byte_array)
+    return np.packbits(np.asarray(bitvector, dtype=bool), bitorder="little").tobytes()
 
 
 def boolean_pack(value: bool, num_bits: int | None = None) -> BitArray:
@@ -2,6 +2,7 @@
 (De)serialization of common types.
 """
 
+import functools
 from typing import no_type_check
 
 import umbi.datatypes
@@ -19,8 +20,9 @@ from .rationals import bytes_to_rational, rational_to_bytes
 from .strings import bytes_to_string, string_to_bytes
 
 
+@functools.lru_cache(maxsize=64)
 def num_bytes_for_common_type(type: CommonType) -> int:
-    """Return the number of bytes needed to represent a value of the given type."""
+    """Return the number of bytes needed to represent a value of the given type. The result is cached per type."""
     if umbi.datatypes.is_fixed_size_integer_type(type):
         return num_bytes_for_fixed_size_integer(type)
     if type == CommonType.DOUBLE:
@@ -6,17 +6,18 @@ import struct
 
 from bitstring import BitArray
 
+# precompiled formats of a double, keyed by little_endian, so the format is not parsed on every call
+DOUBLE_STRUCTS = {True: struct.Struct("<d"), False: struct.Struct(">d")}
+
 
 def double_to_bytes(value: float, little_endian: bool = True) -> bytes:
     """Convert a single double value to a bytestring."""
-    ef = "<" if little_endian else ">"
-    return struct.pack(f"{ef}d", value)
+    return DOUBLE_STRUCTS[little_endian].pack(value)
 
 
 def bytes_to_double(data: bytes, little_endian: bool = True) -> float:
     """Convert a bytestring to a single double value."""
-    ef = "<" if little_endian else ">"
-    return struct.unpack(f"{ef}d", data)[0]
+    return DOUBLE_STRUCTS[little_endian].unpack(data)[0]
 
 
 def double_pack(value: float) -> BitArray:
@@ -4,12 +4,12 @@
 
 import umbi.datatypes
 
-from .strings import bytes_to_string, string_to_bytes
+from .strings import string_to_bytes
 
 
 def bytes_to_json(data: bytes) -> umbi.datatypes.JsonLike:
     """Convert bytes to a JSON object."""
-    return umbi.datatypes.string_to_json(bytes_to_string(data))
+    return umbi.datatypes.utf8_to_json(data)
 
 
 def json_to_bytes(json_obj: umbi.datatypes.JsonLike) -> bytes:
@@ -2,9 +2,13 @@
 (De)serialization of sequences of common types or structs.
 """
 
+import itertools
 import logging
+from fractions import Fraction
 
-from umbi.datatypes import CommonType, StructType
+import numpy as np
+
+from umbi.datatypes import CommonType, Interval, StructType, csr_to_uniform_stride
 
 from .bitvectors import bitvector_to_bytes, bytes_to_bitvector
 from .common import (
@@ -12,25 +16,163 @@ from .common import (
     common_value_to_bytes,
     num_bytes_for_common_type,
 )
-from .structs import struct_pack, struct_unpack
+from .structs import fixed_size_structs_unpack, struct_pack, structs_unpack
 
 logger = logging.getLogger(__name__)
 
+# numpy type codes of the fixed-size numeric types, which are (de)serialized in bulk
+NUMPY_TYPE_CODES = {
+    CommonType.INT16: "i2",
+    CommonType.UINT16: "u2",
+    CommonType.INT32: "i4",
+    CommonType.UINT32: "u4",
+    CommonType.INT64: "i8",
+    CommonType.UINT64: "u8",
+    CommonType.DOUBLE: "f8",
+}
+
+
+# numpy type codes of the terms of the fixed-size composite numeric types: rationals are pairs (numerator,
+# denominator) and intervals are pairs of their bounds
+NUMPY_TERM_TYPE_CODES = {
+    CommonType.RATIONAL: ("i8", "u8"),
+    CommonType.DOUBLE_INTERVAL: ("f8", "f8"),
+    CommonType.RATIONAL_INTERVAL: ("i8", "u8", "i8", "u8"),
+}
+
+
+def numpy_dtype(value_type: CommonType, little_endian: bool = True) -> np.dtype:
+    """Return the numpy dtype of a fixed-size numeric type."""
+    return np.dtype(("<" if little_endian else ">") + NUMPY_TYPE_CODES[value_type])
+
+
+def num_bytes_for_fixed_size_type(value_type: CommonType) -> int | None:
+    """Size in bytes of a value of a type that is decoded in bulk, or None if values of this type are not."""
+    if value_type in NUMPY_TYPE_CODES:
+        return numpy_dtype(value_type).itemsize
+    if value_type in NUMPY_TERM_TYPE_CODES:
+        return sum(np.dtype(code).itemsize for code in NUMPY_TERM_TYPE_CODES[value_type])
+    return None
+
+
+def csr_has_uniform_chunks(csr: np.ndarray, value_type: CommonType) -> bool:
+    """
+    Check whether a CSR splits a binary string into chunks that all have the size of a (bulk-decoded) value type,
+    in which case the CSR is redundant and the string can be decoded without it.
+    """
+    chunk_size = num_bytes_for_fixed_size_type(value_type)
+    return chunk_size is not None and csr_to_uniform_stride(csr) == chunk_size
+
+
+def bytes_to_term_columns(data: bytes | memoryview, value_type: CommonType, little_endian: bool = True) -> list[list]:
+    """
+    Decode a binary string of fixed-size composite numbers (see NUMPY_TERM_TYPE_CODES) in bulk.
+    :return: for each term, the list of its values
+    """
+    ef = "<" if little_endian else ">"
+    term_codes = NUMPY_TERM_TYPE_CODES[value_type]
+    dtype = np.dtype([(f"t{i}", ef + code) for i, code in enumerate(term_codes)])
+    assert len(data) % dtype.itemsize == 0, f"expected {len(data)} to be divisible by {dtype.itemsize}"
+    records = np.frombuffer(data, dtype=dtype)
+    return [records[name].tolist() for name in dtype.names]
+
+
+def bytes_to_composite_vector(data: bytes | memoryview, value_type: CommonType, little_endian: bool = True) -> list:
+    """Decode a binary string of fixed-size rationals or intervals, decoding their terms in bulk."""
+    columns = bytes_to_term_columns(data, value_type, little_endian)
+    if value_type == CommonType.RATIONAL:
+        return list(map(Fraction, *columns))
+    if value_type == CommonType.DOUBLE_INTERVAL:
+        return list(map(Interval, *columns))
+    assert value_type == CommonType.RATIONAL_INTERVAL
+    lower = map(Fraction, columns[0], columns[1])
+    upper = map(Fraction, columns[2], columns[3])
+    return list(map(Interval, lower, upper))
+
+
+def bytes_to_string_vector(data: bytes | memoryview, chunk_ranges: list[tuple[int, int]] | np.ndarray) -> list[str]:
+    """
+    Decode a binary string of utf-8 strings split by chunk ranges. The data is copied once into a single binary
+    string; pure ascii data is even decoded in one go, since its byte offsets are also character offsets.
+    """
+    assert len(data) == chunk_ranges[-1][1], "data length does not match the end of the last chunk range"
+    if isinstance(chunk_ranges, np.ndarray):
+        starts, ends = chunk_ranges[:, 0].tolist(), chunk_ranges[:, 1].tolist()
+    else:
+        starts, ends = [start for start, _ in chunk_ranges], [end for _, end in chunk_ranges]
+    data = bytes(data)
+    if data.isascii():
+        text = data.decode("ascii")
+        return [text[start:end] for start, end in zip(starts, ends)]
+    return [str(data[start:end], "utf-8") for start, end in zip(starts, ends)]
+
+
+def fixed_size_vector_to_array(vector: list, value_type: CommonType, little_endian: bool = True) -> np.ndarray | None:
+    """
+    Convert a vector of fixed-size numbers to an array whose memory holds their binary representation.
+    :return: the array, or None if the values cannot be converted losslessly, e.g. integers out of range or
+        non-integer values for an integer type
+    """
+    dtype = numpy_dtype(value_type, little_endian)
+    array = np.asarray(vector)
+    if array.ndim != 1:
+        return None
+    if dtype.kind == "f":
+        if array.dtype.kind != "f":
+            return None
+    else:
+        if array.dtype.kind not in "iu":
+            return None
+        type_info = np.iinfo(dtype)
+        if len(array) > 0 and (array.min() < type_info.min or array.max() > type_info.max):
+            return None
+    return np.ascontiguousarray(array.astype(dtype, copy=False))
+
+
+def fixed_size_vector_to_bytes(vector: list, value_type: CommonType, little_endian: bool = True) -> bytes | None:
+    """
+    Encode a vector of fixed-size numbers as a binary string in a single pass.
+    :return: the binary string, or None if the values cannot be converted losslessly
+    """
+    array = fixed_size_vector_to_array(vector, value_type, little_endian)
+    return None if array is None else array.tobytes()
+
 
-def bytes_into_chunk_ranges(data: bytes, chunk_ranges: list[tuple[int, int]]) -> list[bytes]:
+def array_to_buffer(array: np.ndarray) -> memoryview:
+    """Expose the memory of a contiguous array as a flat read-only binary string, without copying it."""
+    buffer = memoryview(array).cast("B")
+    return buffer.toreadonly()
+
+
+def bytes_into_chunk_ranges(
+    data: bytes | memoryview, chunk_ranges: list[tuple[int, int]] | np.ndarray
+) -> list[bytes | memoryview]:
     """Split bytestring into chunks according to chunk ranges."""
     assert len(data) == chunk_ranges[-1][1], "data length does not match the end of the last chunk range"
+    if isinstance(chunk_ranges, np.ndarray):
+        # slicing with native ints is much faster than with numpy scalars
+        chunk_ranges = chunk_ranges.tolist()
     return [data[start:end] for start, end in chunk_ranges]
 
 
 def chunks_to_csr(chunks: list[bytes]) -> list[int]:
     """Build csr for a list of chunks."""
-    current_pos = 0
-    csr = [current_pos]
-    for chunk in chunks:
-        current_pos += len(chunk)
-        csr.append(current_pos)
-    return csr
+    return list(itertools.accumulate(map(len, chunks), initial=0))
+
+
+def csr_to_bytes(csr: list[int] | np.ndarray, little_endian: bool = True) -> bytes:
+    """Encode a CSR vector as a binary string of uint64 values in a single pass."""
+    return csr_to_buffer(csr, little_endian).tobytes()
+
+
+def bytes_to_csr(data: bytes | memoryview, little_endian: bool = True) -> np.ndarray:
+    """Decode a binary string of uint64 values as a (read-only) CSR array, without copying the data."""
+    return np.frombuffer(data, dtype=numpy_dtype(CommonType.UINT64, little_endian))
+
+
+def csr_to_buffer(csr: list[int] | np.ndarray, little_endian: bool = True) -> memoryview:
+    """Encode a CSR vector as uint64 values, returned as a view of the encoding array rather than a bytes copy."""
+    return array_to_buffer(np.ascontiguousarray(csr, dtype=numpy_dtype(CommonType.UINT64, little_endian)))
 
 
 def bytes_into_chunks(data: bytes, chunk_size: int) -> list[bytes]:
@@ -41,13 +183,14 @@ def bytes_into_chunks(data: bytes, chunk_size: int) -> list[bytes]:
 
 
 def bytes_to_vector(
-    data: bytes,
+    data: bytes | memoryview,
     value_type: CommonType | StructType,
-    chunk_ranges: list[tuple[int, int]] | None = None,
+    chunk_ranges: list[tuple[int, int]] | np.ndarray | None = None,
     little_endian: bool = True,
 ) -> list:
     """
-    Decode a binary string as a list of numbers.
+    Decode a binary string as a list of numbers. Any bytes-like object can be passed; memoryviews are sliced without
+    copying the data.
     :param value_type: vector element type, either composite, bool, string or one of {int32|uint32|int64|uint64|double|rational}[-interval]
     :param chunk_ranges: (optional) chunk ranges to split the data into
     :param little_endian: if True, the binary string is interpreted as little-endian
@@ -55,8 +198,12 @@ def bytes_to_vector(
 
     if isinstance(value_type, StructType):
         assert chunk_ranges is not None, "chunk_ranges must be provided when value_type is a StructType"
+        structs = fixed_size_structs_unpack(data, chunk_ranges, value_type)
+        if structs is not None:
+            # the structs are decoded column-wise, but returned as dictionaries that callers may modify or serialize
+            return list(structs)
         chunks = bytes_into_chunk_ranges(data, chunk_ranges)
-        return [struct_unpack(chunk, value_type) for chunk in chunks]
+        return structs_unpack(chunks, value_type)
 
     if value_type == CommonType.BOOLEAN:
         assert little_endian, "big-endianness for bitvectors is not implemented"
@@ -65,6 +212,17 @@ def bytes_to_vector(
     if len(data) == 0:
         return []
 
+    if chunk_ranges is None and value_type in NUMPY_TYPE_CODES:
+        dtype = numpy_dtype(value_type, little_endian)
+        assert len(data) % dtype.itemsize == 0, f"expected {len(data)} to be divisible by {dtype.itemsize}"
+        return np.frombuffer(data, dtype=dtype).tolist()
+
+    if chunk_ranges is None and value_type in NUMPY_TERM_TYPE_CODES:
+        return bytes_to_composite_vector(data, value_type, little_endian)
+
+    if chunk_ranges is not None and value_type == CommonType.STRING:
+        return bytes_to_string_vector(data, chunk_ranges)
+
     if chunk_ranges is None:
         chunk_size = num_bytes_for_common_type(value_type)
         chunks = bytes_into_chunks(data, chunk_size)
@@ -96,10 +254,34 @@ def vector_to_bytes(
         assert little_endian, "big-endianness for bitvectors is not implemented"
         return (bitvector_to_bytes(vector), None)
 
+    if value_type in NUMPY_TYPE_CODES:
+        bytestring = fixed_size_vector_to_bytes(vector, value_type, little_endian)
+        if bytestring is not None:
+            return bytestring, None
+        # fall back to per-element encoding, which reports the offending value
+
     chunks = [common_value_to_bytes(item, value_type, little_endian) for item in vector]
     chunks_csr = None
-    if value_type == CommonType.STRING or any(len(chunk) != num_bytes_for_common_type(value_type) for chunk in chunks):
+    if value_type == CommonType.STRING:
         chunks_csr = chunks_to_csr(chunks)
+    else:
+        chunk_size = num_bytes_for_common_type(value_type)
+        if any(len(chunk) != chunk_size for chunk in chunks):
+            chunks_csr = chunks_to_csr(chunks)
     bytestring = b"".join(chunks)
 
     return bytestring, chunks_csr
+
+
+def vector_to_buffer(
+    vector: list, value_type: CommonType | StructType, little_endian: bool = True
+) -> tuple[bytes | memoryview, list[int] | None]:
+    """
+    Same as vector_to_bytes, but vectors of fixed-size numbers are returned as a view of the encoding array, saving
+    a copy of the encoded data.
+    """
+    if len(vector) > 0 and not isinstance(value_type, StructType) and value_type in NUMPY_TYPE_CODES:
+        array = fixed_size_vector_to_array(vector, value_type, little_endian)
+        if array is not None:
+            return array_to_buffer(array), None
+    return vector_to_bytes(vector, value_type, little_endian)
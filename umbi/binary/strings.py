@@ -8,9 +8,9 @@ from .integers import bytes_to_integer, fixed_size_integer_to_bytes
 from .utils import split_bytes
 
 
-def bytes_to_string(bytestring: bytes) -> str:
-    """Convert a binary string to a utf-8 string."""
-    return bytestring.decode("utf-8")
+def bytes_to_string(bytestring: bytes | memoryview) -> str:
+    """Convert a binary string (or any bytes-like object) to a utf-8 string."""
+    return str(bytestring, "utf-8")
 
 
 def string_to_bytes(string: str) -> bytes:
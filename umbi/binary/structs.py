@@ -2,32 +2,40 @@
 Utilities for packing and unpacking composite datatypes (structs).
 """
 
+import functools
+from collections.abc import Callable
 from fractions import Fraction
 
+import numpy as np
 from bitstring import BitArray
 
 from umbi.datatypes import (
     CommonType,
     Numeric,
     StructAttribute,
+    StructBatch,
     StructPadding,
     StructType,
+    csr_to_uniform_stride,
 )
 
 from .bitvectors import boolean_pack, boolean_unpack
-from .floats import double_pack, double_unpack
-from .integers import integer_pack, integer_unpack
+from .floats import DOUBLE_STRUCTS, double_pack, double_unpack
+from .integers import assert_integer_fits, integer_pack, integer_unpack
 from .rationals import rational_pack, rational_unpack
 from .strings import string_pack, string_unpack
 from .utils import split_bytes
 
+# little-endian double, to (de)serialize the bits of a double field
+DOUBLE_STRUCT = DOUBLE_STRUCTS[True]
+
 
 class StructPacker:
     """Utility class for packing structs into a bytestring."""
 
     def __init__(self):
         self.buffer = BitArray()  # bit buffer, MSB at [0]
-        self.bytestring = bytes()  # output bytestring, little-endian order
+        self.bytestring = bytearray()  # output bytestring, little-endian order, extended in place
 
     def assert_buffer_empty(self):
         if len(self.buffer) > 0:
@@ -35,13 +43,13 @@ class StructPacker:
 
     def flush_buffer(self):
         """Flush full bytes from the buffer to the bytestring."""
-        while len(self.buffer) >= 8:  # append one byte at a time so that the bytestring is little-endian
-            self.buffer, bits = (
-                self.buffer[:-8],
-                self.buffer[-8:],
-            )  # get new bits from the end (LSB side)
-            new_bytes = bits.tobytes()
-            self.bytestring += new_bytes
+        num_bits = len(self.buffer) // 8 * 8
+        if num_bits == 0:
+            return
+        # all full bytes are taken from the end (LSB side) at once; reversing their big-endian representation
+        # yields the bytes in little-endian order
+        self.buffer, bits = self.buffer[:-num_bits], self.buffer[-num_bits:]
+        self.bytestring += bits.tobytes()[::-1]
 
     def append_to_buffer(self, bits: BitArray):
         """Append bits to the buffer flush full bytes to the bytestring."""
@@ -92,7 +100,7 @@ class StructPacker:
             assert isinstance(field, StructAttribute)
             self.pack_attribute(field, values[field.name])
         self.assert_buffer_empty()
-        return self.bytestring
+        return bytes(self.bytestring)
 
 
 class StructUnpacker:
@@ -161,11 +169,260 @@ class StructUnpacker:
         return name_value
 
 
+def fixed_size_value_decoder(field: StructAttribute) -> Callable[[int], object]:
+    """Create a function that decodes the value of a fixed-size field from the unsigned integer formed by its bits."""
+    assert field.size is not None
+    num_bits = field.size
+    if field.type == CommonType.BOOLEAN:
+        return bool
+    if field.type == CommonType.UINT:
+        return int
+    if field.type == CommonType.INT:
+        sign_bit = 1 << (num_bits - 1)
+        return lambda value: (value ^ sign_bit) - sign_bit
+    if field.type == CommonType.DOUBLE:
+        assert num_bits == 64, f"expected {num_bits} to be 64 for double type"
+        return lambda value: DOUBLE_STRUCT.unpack(value.to_bytes(8, "little"))[0]
+    raise ValueError(f"unsupported field type: {field.type}")
+
+
+def fixed_size_value_encoder(field: StructAttribute) -> Callable[[object], int]:
+    """Create a function that encodes the value of a fixed-size field as the unsigned integer formed by its bits."""
+    assert field.size is not None
+    num_bits = field.size
+    mask = (1 << num_bits) - 1
+    if field.type == CommonType.BOOLEAN:
+
+        def encode_boolean(value: object) -> int:
+            assert isinstance(value, bool)
+            return int(value)
+
+        return encode_boolean
+    if field.type in [CommonType.INT, CommonType.UINT]:
+        signed = field.type == CommonType.INT
+
+        def encode_integer(value: object) -> int:
+            assert isinstance(value, int)
+            assert_integer_fits(value, signed=signed, num_bits=num_bits)
+            return value & mask
+
+        return encode_integer
+    if field.type == CommonType.DOUBLE:
+        assert num_bits == 64, f"expected {num_bits} to be 64 for double type"
+
+        def encode_double(value: object) -> int:
+            assert isinstance(value, float)
+            return int.from_bytes(DOUBLE_STRUCT.pack(value), "little")
+
+        return encode_double
+    raise ValueError(f"unsupported field type: {field.type}")
+
+
+def encode_string(value: object) -> bytes:
+    assert isinstance(value, str)
+    return string_pack(value)
+
+
+def encode_rational(value: object) -> bytes:
+    assert isinstance(value, Fraction)
+    return rational_pack(value)
+
+
+# types of struct fields that have a fixed size
+FIXED_SIZE_FIELD_TYPES = (CommonType.BOOLEAN, CommonType.INT, CommonType.UINT, CommonType.DOUBLE)
+
+
+@functools.lru_cache(maxsize=128)
+def struct_segments(fields: tuple[StructPadding | StructAttribute, ...]) -> tuple[tuple, ...] | None:
+    """
+    Split the fields of a struct into byte-aligned segments: runs of fixed-size fields, which are (de)serialized as a
+    single integer whose bits hold the fields, and the variable-size fields between them.
+    :return: for each segment, either (number of bytes, ((field, bit offset), ...)) for a run of fixed-size fields, or
+        (None, field) for a variable-size field
+    :return: None if a run of fixed-size fields does not end on a byte boundary
+    """
+    segments: list[tuple] = []
+    run: list[tuple[StructAttribute, int]] = []
+    offset = 0
+    for field in fields:
+        if isinstance(field, StructPadding):
+            offset += field.padding
+            continue
+        if field.type in [CommonType.STRING, CommonType.RATIONAL]:
+            if offset % 8 != 0:
+                return None
+            if offset > 0:
+                segments.append((offset // 8, tuple(run)))
+            segments.append((None, field))
+            run, offset = [], 0
+            continue
+        if field.type not in FIXED_SIZE_FIELD_TYPES or field.size is None:
+            raise ValueError(f"unsupported field type: {field.type}")
+        run.append((field, offset))
+        offset += field.size
+    if offset % 8 != 0:
+        return None
+    if offset > 0:
+        segments.append((offset // 8, tuple(run)))
+    return tuple(segments)
+
+
+@functools.lru_cache(maxsize=128)
+def struct_decoder(
+    fields: tuple[StructPadding | StructAttribute, ...],
+) -> Callable[[bytes | memoryview], dict[str, object]] | None:
+    """
+    Create a function that unpacks a struct with the given fields, specialized to their layout (see
+    struct_segments). The fields of each run are extracted from its integer by shifts, so no bit buffer is needed. The
+    decoder is cached, so it is created once per struct shape.
+    :return: the decoder, or None if the struct cannot be split into byte-aligned segments
+    """
+    segments = struct_segments(fields)
+    if segments is None:
+        return None
+    # fields of a run are given as tuples of (name, bit offset, mask, decoder), variable-size fields as (name, unpack)
+    decoder_segments = []
+    for num_bytes, segment in segments:
+        if num_bytes is None:
+            unpack = string_unpack if segment.type == CommonType.STRING else rational_unpack
+            decoder_segments.append((None, (segment.name, unpack)))
+            continue
+        run = tuple(
+            (field.name, offset, (1 << field.size) - 1, fixed_size_value_decoder(field)) for field, offset in segment
+        )
+        decoder_segments.append((num_bytes, run))
+
+    def decode(bytestring: bytes | memoryview) -> dict[str, object]:
+        name_value = {}
+        for num_bytes, segment in decoder_segments:
+            if num_bytes is None:
+                name, unpack = segment
+                name_value[name], bytestring = unpack(bytestring)
+                continue
+            assert len(bytestring) >= num_bytes, "not enough data to unpack the struct"
+            bits = int.from_bytes(bytestring[:num_bytes], "little")
+            bytestring = bytestring[num_bytes:]
+            for name, offset, mask, decode_value in segment:
+                name_value[name] = decode_value((bits >> offset) & mask)
+        return name_value
+
+    return decode
+
+
+@functools.lru_cache(maxsize=128)
+def struct_encoder(
+    fields: tuple[StructPadding | StructAttribute, ...],
+) -> Callable[[dict[str, object]], bytes] | None:
+    """
+    Create a function that packs a struct with the given fields, specialized to their layout (see struct_segments).
+    The fields of each run are combined into its integer by shifts, so no bit buffer is needed. The encoder is
+    cached, so it is created once per struct shape.
+    :return: the encoder, or None if the struct cannot be split into byte-aligned segments
+    """
+    segments = struct_segments(fields)
+    if segments is None:
+        return None
+    # fields of a run are given as tuples of (name, bit offset, encoder), variable-size fields as (name, pack)
+    encoder_segments = []
+    for num_bytes, segment in segments:
+        if num_bytes is None:
+            pack = encode_string if segment.type == CommonType.STRING else encode_rational
+            encoder_segments.append((None, (segment.name, pack)))
+            continue
+        run = tuple((field.name, offset, fixed_size_value_encoder(field)) for field, offset in segment)
+        encoder_segments.append((num_bytes, run))
+
+    def encode(values: dict[str, object]) -> bytes:
+        parts = []
+        for num_bytes, segment in encoder_segments:
+            if num_bytes is None:
+                name, pack = segment
+                parts.append(pack(values[name]))
+                continue
+            bits = 0
+            for name, offset, encode_value in segment:
+                bits |= encode_value(values[name]) << offset
+            parts.append(bits.to_bytes(num_bytes, "little"))
+        return b"".join(parts)
+
+    return encode
+
+
 def struct_pack(value_type: StructType, values: dict[str, object]) -> bytes:
     """Convert a composite datatype to a BitArray."""
+    encoder = struct_encoder(tuple(value_type.fields))
+    if encoder is not None:
+        return encoder(values)
     return StructPacker().pack_struct(value_type, values)
 
 
 def struct_unpack(bytestring: bytes, value_type: StructType) -> dict[str, object]:
     """Unpack a BitArray to a composite datatype."""
+    decoder = struct_decoder(tuple(value_type.fields))
+    if decoder is not None:
+        return decoder(bytestring)
     return StructUnpacker(bytestring).unpack_struct(value_type)
+
+
+def structs_unpack(bytestrings: list[bytes], value_type: StructType) -> list[dict[str, object]]:
+    """Unpack a sequence of structs of the same type, analyzing the struct layout only once."""
+    decoder = struct_decoder(tuple(value_type.fields))
+    if decoder is not None:
+        return [decoder(bytestring) for bytestring in bytestrings]
+    return [StructUnpacker(bytestring).unpack_struct(value_type) for bytestring in bytestrings]
+
+
+def fixed_size_field_unpack(rows: np.ndarray, field_type: CommonType, offset: int, num_bits: int) -> list:
+    """
+    Decode a single field from each row of a 2D array of struct bytes. Fields are stored least significant bit first,
+    starting at the given bit offset.
+    """
+    first_byte, last_byte = offset // 8, (offset + num_bits + 7) // 8
+    bits = np.unpackbits(rows[:, first_byte:last_byte], axis=1, bitorder="little")
+    bits = bits[:, offset - 8 * first_byte : offset - 8 * first_byte + num_bits]
+    if field_type == CommonType.BOOLEAN:
+        return bits.any(axis=1).tolist()
+    field_bytes = np.packbits(bits, axis=1, bitorder="little")
+    field_bytes = np.pad(field_bytes, ((0, 0), (0, 8 - field_bytes.shape[1])))
+    values = np.ascontiguousarray(field_bytes).view("<u8")[:, 0]
+    if field_type == CommonType.DOUBLE:
+        assert num_bits == 64, f"expected {num_bits} to be 64 for double type"
+        return values.view("<f8").tolist()
+    if field_type == CommonType.INT and num_bits < 64:
+        # sign-extend the num_bits-bit two's complement values
+        sign_bit = np.uint64(1 << (num_bits - 1))
+        return ((values ^ sign_bit).astype(np.int64) - np.int64(sign_bit)).tolist()
+    if field_type == CommonType.INT:
+        return values.view("<i8").tolist()
+    return values.tolist()
+
+
+def fixed_size_structs_unpack(data: bytes | memoryview, chunk_ranges, value_type: StructType) -> StructBatch | None:
+    """
+    Unpack a sequence of structs whose fields all have a fixed size, decoding every field for all structs at once.
+    :param chunk_ranges: byte ranges of the individual structs
+    :return: the unpacked structs, stored column-wise, or None if the struct has variable-size fields or the structs
+        do not have equal sizes, in which case they have to be unpacked one by one
+    """
+    segments = struct_segments(tuple(value_type.fields))
+    # the fields must form a single run (see struct_segments) of fields decoded as 64-bit integers at most
+    if segments is None or len(segments) != 1 or segments[0][0] is None:
+        return None
+    num_bytes, run = segments[0]
+    if any(field.size > 64 for field, _ in run):
+        return None
+    ranges = np.asarray(chunk_ranges, dtype=np.uint64).reshape(-1, 2)
+    num_structs = len(ranges)
+    if num_structs == 0:
+        return None
+    struct_size = int(ranges[0, 1] - ranges[0, 0])
+    if struct_size < num_bytes or len(data) != num_structs * struct_size:
+        return None
+    # the structs must be laid out back to back: evenly spaced from 0 and each of the same size
+    if ranges[0, 0] != 0 or (num_structs > 1 and csr_to_uniform_stride(ranges[:, 0]) != struct_size):
+        return None
+    if not np.all(ranges[:, 1] - ranges[:, 0] == struct_size):
+        return None
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(num_structs, struct_size)
+    columns = {field.name: fixed_size_field_unpack(rows, field.type, offset, field.size) for field, offset in run}
+    return StructBatch(columns, num_structs)
@@ -26,10 +26,12 @@ from .json import (
     json_remove_none_dict_values,
     json_to_string,
     string_to_json,
+    utf8_to_json,
 )
 from .struct import (
     StructPadding,
     StructAttribute,
+    StructBatch,
     StructType,
 )
 from .utils import (
@@ -45,6 +47,7 @@ from .vector import (
     is_vector_of_type,
     vector_element_types,
     csr_to_ranges,
+    csr_to_uniform_stride,
 )
 from .promotion import (
     promote_numeric_primitive,
@@ -74,6 +77,7 @@ __all__ = [
     "StructPadding",
     "StructAttribute",
     "StructType",
+    "StructBatch",
     # json.py
     "JsonPrimitive",
     "JsonList",
@@ -83,6 +87,7 @@ __all__ = [
     "json_remove_none_dict_values",
     "json_to_string",
     "string_to_json",
+    "utf8_to_json",
     # utils.py
     "NumericPrimitive",
     "Numeric",
@@ -97,6 +102,7 @@ __all__ = [
     "promote_vector",
     "promote_to_vector_of_numeric",
     "csr_to_ranges",
+    "csr_to_uniform_stride",
     # promotion.py
     "promote_numeric_primitive",
     "promote_numeric",
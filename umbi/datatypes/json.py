@@ -3,6 +3,18 @@ JSON operations and utilities.
 """
 
 import json as std_json
+import re
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+# runs of digits that may encode an integer outside of the 64-bit range, which orjson silently parses as a float; JSON
+# that orjson rejects instead (e.g. NaN, 1e400 or lone surrogates) is parsed again by the standard library
+ORJSON_INCOMPATIBLE = re.compile(r"\d{19}")
+# the same for utf-8 encoded json
+ORJSON_INCOMPATIBLE_BYTES = re.compile(rb"\d{19}")
 
 JsonPrimitive = None | bool | int | float | str
 JsonList = list["JsonLike"]
@@ -21,16 +33,26 @@ def is_json_instance(value: object) -> bool:
 
 
 def json_remove_none_dict_values(json_obj: JsonLike) -> JsonLike:
-    """Recursively remove all None (null) dictionary values from a JSON (sub-)object."""
+    """
+    Recursively remove all None (null) dictionary values from a JSON (sub-)object. The object is copied rather than
+    modified, since parts of it may be shared, e.g. raw values dumped by a schema. Only containers are descended
+    into, so primitive values cost no function call.
+    """
     if isinstance(json_obj, dict):
-        return {k: json_remove_none_dict_values(v) for k, v in json_obj.items() if v is not None}
+        return {
+            k: json_remove_none_dict_values(v) if isinstance(v, (dict, list)) else v
+            for k, v in json_obj.items()
+            if v is not None
+        }
     elif isinstance(json_obj, list):
-        return [json_remove_none_dict_values(v) for v in json_obj]
+        return [json_remove_none_dict_values(v) if isinstance(v, (dict, list)) else v for v in json_obj]
     return json_obj
 
 
 def json_to_string(json_obj: JsonLike, indent: int | None = 4, **kwargs) -> str:
     """
+    Always uses the standard library, so the output does not depend on whether orjson is installed; orjson would,
+    for instance, write NaN as null.
     :raises: JSONEncodeError if the object is not serializable
     """
     return std_json.dumps(json_obj, indent=indent, **kwargs)
@@ -38,6 +60,27 @@ def json_to_string(json_obj: JsonLike, indent: int | None = 4, **kwargs) -> str:
 
 def string_to_json(json_str: str) -> JsonLike:
     """
+    Uses orjson if available and the string contains no integers that might exceed 64 bits. Strings rejected by orjson
+    are parsed again by the standard library, which also accepts e.g. NaN and Infinity.
     :raises: JSONDecodeError if the string is not valid JSON
     """
+    if orjson is not None and ORJSON_INCOMPATIBLE.search(json_str) is None:
+        try:
+            return orjson.loads(json_str)
+        except orjson.JSONDecodeError:
+            pass
     return std_json.loads(json_str)
+
+
+def utf8_to_json(json_bytes: bytes | memoryview) -> JsonLike:
+    """
+    Parse utf-8 encoded JSON. orjson, if available, parses the binary string directly, without decoding it into a
+    string first; as in string_to_json, the standard library parses whatever orjson does not.
+    :raises: JSONDecodeError if the string is not valid JSON
+    """
+    if orjson is not None and ORJSON_INCOMPATIBLE_BYTES.search(json_bytes) is None:
+        try:
+            return orjson.loads(json_bytes)
+        except orjson.JSONDecodeError:
+            pass
+    return std_json.loads(str(json_bytes, "utf-8"))
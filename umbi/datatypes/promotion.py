@@ -94,7 +94,22 @@ def promote_to_vector_of_numeric_primitive(vector: list, target_type: CommonType
     return [promote_numeric_primitive(elem, target_type) for elem in vector]
 
 
+# primitive numeric types -> python type of the values of this type
+PRIMITIVE_NUMERIC_PYTHON_TYPES = {
+    CommonType.INT: int,
+    CommonType.DOUBLE: float,
+    CommonType.RATIONAL: Fraction,
+}
+
+
 def promote_to_vector_of_numeric(vector: list, target_type: CommonType) -> list:
+    python_type = PRIMITIVE_NUMERIC_PYTHON_TYPES.get(target_type)
+    if python_type is not None:
+        # common case: the values already have the target type (e.g. probabilities given as floats), so promoting
+        # them would only copy them one by one
+        if all(type(elem) is python_type for elem in vector):
+            return list(vector)
+        return promote_to_vector_of_numeric_primitive(vector, target_type)
     return [promote_numeric(elem, target_type) for elem in vector]
 
 
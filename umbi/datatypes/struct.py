@@ -5,12 +5,13 @@ This module contains the core classes for defining composite datatypes (structs)
 The serialization operations for composites remain in umbi.binary.composites.
 """
 
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 
 from .common_type import CommonType
 
 
-@dataclass
+@dataclass(frozen=True)
 class StructPadding:
     """Padding bits in a composite datatype."""
 
@@ -21,7 +22,7 @@ class StructPadding:
             raise ValueError(f"Padding must be positive ({self.padding})")
 
 
-@dataclass
+@dataclass(frozen=True)
 class StructAttribute:
     """A variable field in a composite datatype."""
 
@@ -116,3 +117,45 @@ class StructType:
                 CommonType.DOUBLE: 64,
             }[type]
         self.fields.append(StructAttribute(name=name, type=type, size=size))
+
+
+class StructBatch(Sequence):
+    """
+    A sequence of structs stored as one column of values per attribute. Individual structs are materialized as
+    dictionaries only when accessed, so a batch can be processed column-wise without creating them at all.
+    """
+
+    def __init__(self, columns: dict[str, list], num_structs: int):
+        assert all(len(values) == num_structs for values in columns.values()), "unexpected number of values"
+        self.columns = columns
+        self.num_structs = num_structs
+
+    def __len__(self) -> int:
+        return self.num_structs
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.num_structs))]
+        if index < 0:
+            index += self.num_structs
+        if not 0 <= index < self.num_structs:
+            raise IndexError(f"struct index {index} out of range")
+        return {name: values[index] for name, values in self.columns.items()}
+
+    def __iter__(self):
+        names = list(self.columns.keys())
+        if len(names) == 0:
+            return ({} for _ in range(self.num_structs))
+        return (dict(zip(names, row)) for row in zip(*self.columns.values()))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, StructBatch):
+            return self.num_structs == other.num_structs and self.columns == other.columns
+        if isinstance(other, Sequence):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"StructBatch({list(self)})"
@@ -2,8 +2,11 @@
 Auxiliary vector operations.
 """
 
+import itertools
 from dataclasses import dataclass
 
+import numpy as np
+
 from .common_type import CommonType
 from .utils import (
     get_instance_type,
@@ -14,7 +17,7 @@ from .utils import (
 # TODO add vector of ranges (for CSR?)
 
 
-@dataclass
+@dataclass(frozen=True)
 class VectorType:
     base_type: CommonType
 
@@ -55,14 +58,11 @@ def is_vector_ranges(ranges: list[tuple[int, int]]) -> bool:
         return False
 
     def is_interval(x: tuple[int, int]) -> bool:
-        return isinstance(x, tuple) and len(x) == 2 and all(isinstance(y, int) for y in x) and x[0] <= x[1]
+        return isinstance(x, tuple) and len(x) == 2 and isinstance(x[0], int) and isinstance(x[1], int) and x[0] <= x[1]
 
     if not all(is_interval(interval) for interval in ranges):
         return False
-    for i in range(len(ranges) - 1):
-        if ranges[i][1] != ranges[i + 1][0]:
-            return False
-    return True
+    return all(left[1] == right[0] for left, right in itertools.pairwise(ranges))
 
 
 def is_vector_csr(vector: list[int]) -> bool:
@@ -73,21 +73,41 @@ def is_vector_csr(vector: list[int]) -> bool:
         return False
     if vector[0] != 0:
         return False
-    if not all(vector[i] <= vector[i + 1] for i in range(len(vector) - 1)):
-        return False
-    return True
-
-
-def csr_to_ranges(csr: list[int]) -> list[tuple[int, int]]:
-    """Convert row start indices to ranges."""
+    return all(a <= b for a, b in itertools.pairwise(vector))
+
+
+def csr_to_ranges(csr: list[int] | np.ndarray) -> list[tuple[int, int]] | np.ndarray:
+    """
+    Convert row start indices to ranges.
+    :return: a list of ranges, or an (n,2) array of ranges if the row start indices are given as an array; the array
+        is a read-only view of the row start indices, so no memory is allocated
+    """
+    if isinstance(csr, np.ndarray):
+        assert len(csr) >= 2 and csr[0] == 0 and np.all(csr[:-1] <= csr[1:]), "input is not a valid CSR vector"
+        return np.lib.stride_tricks.sliding_window_view(csr, 2)
     assert is_vector_csr(csr), "input is not a valid CSR vector"
-    ranges = [(csr[i], csr[i + 1]) for i in range(len(csr) - 1)]
+    ranges = list(itertools.pairwise(csr))
     return ranges
 
 
+def csr_to_uniform_stride(csr: list[int] | np.ndarray) -> int | None:
+    """
+    Determine the common length of all rows of a CSR vector (or, equivalently, the stride of evenly spaced offsets
+    starting at 0), without building the ranges.
+    :return: the row length, or None if the rows have different lengths or there are fewer than two offsets
+    """
+    csr = np.asarray(csr)
+    if len(csr) < 2 or csr[0] != 0:
+        return None
+    stride = csr[1] - csr[0]
+    if not np.all(np.diff(csr) == stride):
+        return None
+    return int(stride)
+
+
 def ranges_to_csr(ranges: list[tuple[int, int]]) -> list[int]:
     """Convert ranges to CSR row start indices."""
     assert is_vector_ranges(ranges), "input is not a valid ranges vector"
-    csr = [interval[0] for interval in ranges]
+    csr = [start for start, _ in ranges]
     csr.append(ranges[-1][-1])
     return csr
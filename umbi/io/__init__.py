@@ -3,13 +3,15 @@ umbi.io: Utilities for binary and JSON serialization, and tar archive handling.
 """
 
 from . import index
-from .umb import ExplicitUmb, read_umb, write_umb
+from .umb import ExplicitUmb, LazyExplicitUmb, read_umb, read_umb_lazy, write_umb
 from .umb_ats_converter import read_ats, write_ats
 
 __all__ = [
     "index",
     "ExplicitUmb",
+    "LazyExplicitUmb",
     "read_umb",
+    "read_umb_lazy",
     "write_umb",
     "read_ats",
     "write_ats",
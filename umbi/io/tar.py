@@ -2,9 +2,31 @@
 Utilities for reading/wrting Tar archives.
 """
 
-import io as std_io
+import bz2
+import collections
+import concurrent.futures
+import contextlib
+import enum
+import functools
+import gzip
+import io
 import logging
+import lzma
+import mmap
+import os
+import shutil
+import subprocess
 import tarfile
+import uuid
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
 import umbi.binary
 import umbi.datatypes
 from umbi.datatypes import (
@@ -15,25 +37,215 @@ from umbi.datatypes import (
 
 logger = logging.getLogger(__name__)
 
+# magic number of the zstd format
+ZSTD_MAGIC_NUMBER = b"\x28\xb5\x2f\xfd"
+# magic numbers of the gzip, bz2, xz and zstd formats
+COMPRESSION_MAGIC_NUMBERS = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00", ZSTD_MAGIC_NUMBER)
+# supported compression algorithms, "" stands for no compression
+COMPRESSIONS = ("", "gz", "bz2", "xz", "zst")
+# zstd compression level
+ZSTD_LEVEL = 3
+# size of the pieces in which tarfile copies files into a stream that it compresses itself
+STREAM_COPY_BUFFER_SIZE = 1 << 20
+# gzipped tarballs at least this large are compressed in parallel, by pigz if available or by a thread pool otherwise
+PARALLEL_GZIP_MIN_SIZE = 1 << 22
+# size of the uncompressed chunks that are compressed independently when compressing in parallel
+PARALLEL_GZIP_CHUNK_SIZE = 1 << 20
+# number of chunks per worker that are compressed or waiting to be written at any time when compressing in parallel
+PARALLEL_GZIP_CHUNKS_PER_WORKER = 2
+# longest filename (in bytes) stored in a ustar header, which is the format of all tarballs written
+USTAR_MAX_NAME_LENGTH = 100
+# largest file stored in a ustar header, whose size field holds 11 octal digits
+USTAR_MAX_SIZE = 8**11 - 1
+
+
+class FileKind(enum.IntEnum):
+    """Kinds of files that can be stored in a tarball, determining how their contents are (de)serialized."""
+
+    BYTES = 0
+    JSON = 1
+    VECTOR = 2
+
+
+@functools.lru_cache(maxsize=64)
+def parse_filetype(filetype: CommonType | VectorType) -> tuple[FileKind, CommonType | None]:
+    """
+    Determine the kind of a file type and, for vectors, the type of its elements. The result is cached, so every file
+    type is parsed only once.
+    :return: the kind of the file
+    :return: vector element type, or None if the file is not a vector
+    :raises: ValueError if the file type is not recognized
+    """
+    if filetype == CommonType.BYTES:
+        return FileKind.BYTES, None
+    if filetype == CommonType.JSON:
+        return FileKind.JSON, None
+    if isinstance(filetype, VectorType):
+        return FileKind.VECTOR, filetype.base_type
+    raise ValueError(f"unrecognized file type {filetype}")
+
+
+def require_zstandard():
+    """:raises: ImportError if the optional zstandard package, needed for zstd compression, is not installed"""
+    if zstandard is None:
+        raise ImportError("zstd-compressed tarballs require the zstandard package")
+
+
+@functools.cache
+def pigz_executable() -> str | None:
+    """
+    Locate the pigz executable, which is looked up only once.
+    :return: path to pigz, or None if it is not available
+    """
+    return shutil.which("pigz")
+
+
+def check_ustar_member(filename: str, size: int):
+    """:raises: ValueError if a file with the given name and size cannot be stored in a ustar tarball"""
+    if len(filename.encode()) > USTAR_MAX_NAME_LENGTH:
+        raise ValueError(
+            f"cannot write {filename} to a tarball: filenames are limited to {USTAR_MAX_NAME_LENGTH} bytes"
+        )
+    if size > USTAR_MAX_SIZE:
+        raise ValueError(f"cannot write {filename} to a tarball: files are limited to {USTAR_MAX_SIZE} bytes")
+
+
+def gzip_compress_chunk(chunk: bytes) -> bytes:
+    """Compress a chunk of a tar stream as a standalone gzip member."""
+    return gzip.compress(chunk, mtime=0)
+
+
+def temporary_path(path: str) -> str:
+    """
+    A unique path in the directory of the given path. A file written there can replace the file at the given path
+    atomically, so that the latter is never left half-written.
+    """
+    directory, filename = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+
+
+def remove_file(path: str):
+    """Remove a file if it exists."""
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def split_into_chunks(pieces: Iterable[bytes], chunk_size: int) -> Iterator[bytes]:
+    """Concatenate binary strings and split the result into chunks of chunk_size bytes (the last may be shorter)."""
+    pending = bytearray()
+    for piece in pieces:
+        view = memoryview(piece)
+        while len(pending) + len(view) >= chunk_size:
+            num_taken = chunk_size - len(pending)
+            pending += view[:num_taken]
+            yield bytes(pending)
+            pending = bytearray()
+            view = view[num_taken:]
+        pending += view
+    if len(pending) > 0:
+        yield bytes(pending)
+
+
+class BufferReader:
+    """A read-only file object over a binary string, whose reads return views of the string rather than copies."""
+
+    def __init__(self, data: bytes | memoryview):
+        self.view = memoryview(data)
+        self.position = 0
+
+    def read(self, size: int | None = -1) -> memoryview:
+        end = len(self.view) if size is None or size < 0 else min(self.position + size, len(self.view))
+        chunk = self.view[self.position : end]
+        self.position = end
+        return chunk
+
 
 class TarReader:
     """An auxiliary class to simplify tar reading."""
 
     @staticmethod
-    def load_tar(tarpath: str) -> dict[str, bytes]:
+    def is_compressed(tarpath: str) -> bool:
+        """Check whether a tarball is compressed using one of the formats supported by tarfile, or zstd."""
+        with open(tarpath, "rb") as f:
+            magic = f.read(max(len(m) for m in COMPRESSION_MAGIC_NUMBERS))
+        return magic.startswith(COMPRESSION_MAGIC_NUMBERS)
+
+    @staticmethod
+    def decompress_tar(tarpath: str) -> bytes:
+        """
+        Decompress a compressed tarball as a whole. Each format is decompressed in a single call rather than in the
+        small pieces in which tarfile reads a compressed stream.
+        :return: the uncompressed tarball
+        """
+        with open(tarpath, "rb") as f:
+            if hasattr(os, "posix_fadvise"):
+                # the tarball is read front to back in full, so let the kernel read ahead aggressively
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            compressed = f.read()
+        if compressed.startswith(b"\x1f\x8b"):
+            return gzip.decompress(compressed)
+        if compressed.startswith(b"BZh"):
+            return bz2.decompress(compressed)
+        if compressed.startswith(b"\xfd7zXZ\x00"):
+            return lzma.decompress(compressed)
+        assert compressed.startswith(ZSTD_MAGIC_NUMBER), f"unexpected compression of {tarpath}"
+        require_zstandard()
+        # frames written in streaming mode do not record their size, so a one-shot decompress cannot be used
+        with zstandard.ZstdDecompressor().stream_reader(compressed) as stream:
+            return stream.read()
+
+    @staticmethod
+    def load_members(tar: tarfile.TarFile, tar_view: memoryview) -> dict[str, bytes | memoryview]:
+        """
+        Load all files from an uncompressed tarball held in memory. File contents are returned as read-only
+        memoryviews into the tarball, so no file is copied.
+        :param tar: the tarball opened in read mode
+        :param tar_view: the contents of the tarball
+        :return: a dictionary filename -> binary string
+        """
+        filename_data: dict[str, bytes | memoryview] = {}
+        # members are visited while their headers are read, in a single pass over the tarball
+        for member in tar:
+            if not member.isfile():
+                continue
+            if member.issparse():
+                fileobj = tar.extractfile(member)
+                assert fileobj is not None
+                filename_data[member.name] = fileobj.read()
+                continue
+            filename_data[member.name] = tar_view[member.offset_data : member.offset_data + member.size]
+        return filename_data
+
+    @staticmethod
+    def load_tar_mmap(tarpath: str) -> dict[str, bytes | memoryview]:
+        """
+        Load all files from an uncompressed tarball. The tarball is memory-mapped and file contents are returned as
+        read-only memoryviews into the mapping, so no file is copied out of the page cache. The mapping is released
+        once the last of these views is released, see TarReader.close().
+        :return: a dictionary filename -> binary string
+        """
+        with open(tarpath, "rb") as f, tarfile.open(fileobj=f, mode="r:") as tar:
+            # the tarball is opened first, so that an empty file is reported as an invalid tarball
+            tar_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(mmap, "MADV_WILLNEED"):
+                # every file is decoded in full, so let the kernel read ahead instead of faulting page by page
+                tar_map.madvise(mmap.MADV_WILLNEED)
+            return TarReader.load_members(tar, memoryview(tar_map))
+
+    @staticmethod
+    def load_tar(tarpath: str) -> dict[str, bytes | memoryview]:
         """
         Load all files from a tarball into memory.
         :return: a dictionary filename -> binary string
         """
         logger.debug(f"loading tarfile from {tarpath} ...")
-        filename_data = {}
-        with tarfile.open(tarpath, mode="r:*") as tar:
-            for member in tar.getmembers():
-                if member.isfile():
-                    fileobj = tar.extractfile(member)
-                    if fileobj is None:
-                        raise KeyError(f"Could not extract file {member.name} from {tarpath}")
-                    filename_data[member.name] = fileobj.read()
+        if not TarReader.is_compressed(tarpath):
+            filename_data = TarReader.load_tar_mmap(tarpath)
+        else:
+            # the whole tarball is decompressed at once and its files become views into the result
+            tar_data = TarReader.decompress_tar(tarpath)
+            with tarfile.open(fileobj=io.BytesIO(tar_data), mode="r:") as tar:
+                filename_data = TarReader.load_members(tar, memoryview(tar_data))
         logger.debug("successfully loaded the tarfile")
         return filename_data
 
@@ -43,44 +255,86 @@ class TarReader:
         # filenames_str = "\n".join(self.filenames)
         # logger.debug(f"found the following files:\n{filenames_str}")
 
+    def close(self):
+        """
+        Release the contents of the tarball, so that an uncompressed tarball is unmapped right away rather than when
+        the reader is garbage-collected. Binary strings returned by read_file must not be used afterwards; those
+        still used by other objects, e.g. numpy arrays, are released once these objects are.
+        """
+        for data in self.filename_data.values():
+            if isinstance(data, memoryview):
+                with contextlib.suppress(BufferError):
+                    data.release()
+        self.filename_data = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     @property
     def filenames(self) -> list[str]:
         """List of filenames in the tarball."""
         return list(self.filename_data.keys())
 
-    def read_file(self, filename: str, required: bool = False) -> bytes | None:
-        """Read raw bytes from a specific file in the tarball"""
-        if filename not in self.filenames:
+    def read_file(self, filename: str, required: bool = False, evict: bool = False) -> bytes | memoryview | None:
+        """
+        Read raw bytes from a specific file in the tarball. Files are returned as read-only memoryviews that share
+        memory with the (uncompressed) tarball.
+        :param evict: if True, release the file contents from the reader; the file cannot be read again
+        """
+        # a single dictionary operation per read: fetch (or evict) and test for absence at once
+        data = self.filename_data.pop(filename, None) if evict else self.filename_data.get(filename)
+        if data is None:
             if not required:
                 return None
             else:
                 raise KeyError(f"tar archive {self.tarpath} has no file {filename}")
         logger.debug(f"loading {filename}")
-        return self.filename_data[filename]
+        return data
 
-    def read_filetype(self, filename: str, filetype: CommonType | VectorType, required: bool = False):
+    def read_filetype(
+        self, filename: str, filetype: CommonType | VectorType, required: bool = False, evict: bool = False
+    ):
         """
         Read a file of a specific type.
         :param filename: name of the file to read
-        :param filetype: one of ["bytes", "json", "csr", "vector[X]"]
+        :param filetype: one of CommonType.BYTES, CommonType.JSON or a VectorType
         :param required: if True, raise an error if the file is not found
+        :param evict: if True, release the file contents from the reader after reading
         """
-        data = self.read_file(filename, required)
+        kind, value_type = parse_filetype(filetype)
+        data = self.read_file(filename, required, evict)
         if data is None:
             return None
-        if filetype == CommonType.BYTES:
+        if kind == FileKind.BYTES:
             return data
-        if filetype == CommonType.JSON:
+        if kind == FileKind.JSON:
             return umbi.binary.bytes_to_common_value(data, CommonType.JSON)
         # if filetype == VECTOR_TYPE_CSR:
         #     return umbi.binary.bytes_to_vector(data, VECTOR_TYPE_CSR.base_type)
-        if isinstance(filetype, VectorType):
-            return umbi.binary.bytes_to_vector(data, filetype.base_type)
-        else:
-            raise ValueError(f"unrecognized file type {filetype} for file {filename}")
+        assert value_type is not None
+        return umbi.binary.bytes_to_vector(data, value_type)
+
+    def read_csr(self, filename: str, required: bool = False, evict: bool = False) -> np.ndarray | None:
+        """
+        Read a CSR file as a numpy array of row start indices, without converting them to python integers.
+        :return: read-only array of uint64 row start indices, or None if the file is not found
+        """
+        data = self.read_file(filename, required, evict)
+        if data is None:
+            return None
+        return umbi.binary.bytes_to_csr(data)
 
     def read_filetype_with_csr(
-        self, filename: str, value_type: CommonType, required: bool, filename_csr: str, required_csr: bool = False
+        self,
+        filename: str,
+        value_type: CommonType,
+        required: bool,
+        filename_csr: str,
+        required_csr: bool = False,
+        evict: bool = False,
     ) -> list | None:
         """
         Read a file containing a vector of values. Use an accompanying CSR file if needed.
@@ -89,51 +343,311 @@ class TarReader:
         :param required: if True, raise an error if the main file is not found
         :param filename_csr: name of the accompanying CSR file
         :param required_csr: if True, raise an error if the CSR file is not found
+        :param evict: if True, release the contents of both files from the reader after reading
         """
-        data = self.read_file(filename, required)
+        data = self.read_file(filename, required, evict)
         if data is None:
             return None
-        chunk_ranges = self.read_filetype(filename_csr, VECTOR_TYPE_CSR, required=required_csr)
-        if chunk_ranges is not None:
-            assert isinstance(chunk_ranges, list)
-            chunk_ranges = umbi.datatypes.csr_to_ranges(chunk_ranges)
+        csr = self.read_csr(filename_csr, required=required_csr, evict=evict)
+        if csr is not None and umbi.binary.csr_has_uniform_chunks(csr, value_type):
+            # fixed-size values are decoded in bulk when no splitting is needed
+            csr = None
+        chunk_ranges = umbi.datatypes.csr_to_ranges(csr) if csr is not None else None
         return umbi.binary.bytes_to_vector(data, value_type, chunk_ranges=chunk_ranges)
 
 
 class TarWriter:
     """An auxiliary class to simplify tar writing."""
 
+    @staticmethod
+    def copy_buffer_size(filename_data: dict[str, bytes]) -> int | None:
+        """
+        Buffer size large enough for tarfile to copy every file in a single read. Since a BufferReader returns views
+        of the file contents, no per-file buffers are allocated.
+        """
+        return max((len(data) for data in filename_data.values()), default=0) or None
+
+    @staticmethod
+    def add_members(tar: tarfile.TarFile, filename_data: dict[str, bytes]):
+        """Add all files to an open tarball."""
+        # a single header is reused for all files since tarfile stores its own copy of it on every addfile
+        tar_info = tarfile.TarInfo()
+        for filename, data in filename_data.items():
+            tar_info.name = filename
+            tar_info.size = len(data)
+            tar.addfile(tar_info, BufferReader(data))
+
+    @staticmethod
+    def tar_write_pigz(tarpath: str, filename_data: dict[str, bytes], pigz: str):
+        """
+        Create a gzipped tarball by piping an uncompressed tar stream through pigz, which compresses on all cores.
+        :param pigz: path to the pigz executable
+        """
+        with open(tarpath, "wb") as tarfile_out:
+            proc = subprocess.Popen([pigz, "-p", str(os.cpu_count() or 1)], stdin=subprocess.PIPE, stdout=tarfile_out)
+            assert proc.stdin is not None
+            try:
+                copybufsize = TarWriter.copy_buffer_size(filename_data)
+                with tarfile.open(
+                    fileobj=proc.stdin, mode="w|", format=tarfile.USTAR_FORMAT, copybufsize=copybufsize
+                ) as tar:
+                    TarWriter.add_members(tar, filename_data)
+            finally:
+                proc.stdin.close()
+                returncode = proc.wait()
+        if returncode != 0:
+            raise RuntimeError(f"pigz exited with code {returncode} while writing {tarpath}")
+
+    @staticmethod
+    def tar_write_zstd(tarpath: str, filename_data: dict[str, bytes]):
+        """Create a zstd-compressed tarball. The compression runs on all cores."""
+        require_zstandard()
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+        with open(tarpath, "wb") as tarfile_out, compressor.stream_writer(tarfile_out) as stream:
+            copybufsize = TarWriter.copy_buffer_size(filename_data)
+            with tarfile.open(fileobj=stream, mode="w|", format=tarfile.USTAR_FORMAT, copybufsize=copybufsize) as tar:
+                TarWriter.add_members(tar, filename_data)
+
+    @staticmethod
+    def member_pieces(tar_info: tarfile.TarInfo, filename: str, data: bytes | memoryview) -> tuple:
+        """
+        Pieces of an uncompressed ustar stream that store a single file: the header, the contents and the padding.
+        :param tar_info: a header object that is filled in for this file
+        """
+        tar_info.name = filename
+        tar_info.size = len(data)
+        header = tar_info.tobuf(format=tarfile.USTAR_FORMAT)
+        padding = tarfile.NUL * (-len(data) % tarfile.BLOCKSIZE)
+        return header, data, padding
+
+    @staticmethod
+    def end_of_archive(offset: int) -> bytes:
+        """End-of-archive marker of a ustar stream of offset bytes, padded to a full record, as written by tarfile."""
+        offset += 2 * tarfile.BLOCKSIZE
+        return tarfile.NUL * (2 * tarfile.BLOCKSIZE + -offset % tarfile.RECORDSIZE)
+
+    @staticmethod
+    def tar_stream(filename_data: dict[str, bytes]) -> Iterator[bytes]:
+        """Generate the pieces of an uncompressed ustar stream containing the given files."""
+        tar_info = tarfile.TarInfo()
+        offset = 0
+        for filename, data in filename_data.items():
+            pieces = TarWriter.member_pieces(tar_info, filename, data)
+            yield from pieces
+            offset += sum(len(piece) for piece in pieces)
+        yield TarWriter.end_of_archive(offset)
+
+    @staticmethod
+    def tar_write_gzip_parallel(tarpath: str, filename_data: dict[str, bytes], max_workers: int | None = None):
+        """
+        Create a gzipped tarball by compressing chunks of the tar stream in a thread pool; zlib releases the GIL while
+        compressing, so the chunks are compressed in parallel. The compressed chunks are concatenated into a
+        multi-member gzip file, which decompresses to the original tar stream. Only a bounded number of chunks is
+        held in memory at any time.
+        :param max_workers: number of worker threads, defaults to the number of CPUs
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        chunks = split_into_chunks(TarWriter.tar_stream(filename_data), PARALLEL_GZIP_CHUNK_SIZE)
+        pending: collections.deque[concurrent.futures.Future] = collections.deque()
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor, open(tarpath, "wb") as tarfile_out:
+            for chunk in chunks:
+                if len(pending) >= PARALLEL_GZIP_CHUNKS_PER_WORKER * max_workers:
+                    tarfile_out.write(pending.popleft().result())
+                pending.append(executor.submit(gzip_compress_chunk, chunk))
+            while pending:
+                tarfile_out.write(pending.popleft().result())
+
     @classmethod
     def tar_write(cls, tarpath: str, filename_data: dict[str, bytes], compression: str = "gz"):
         """
-        Create a tarball file with the given contents.
+        Create a tarball file with the given contents. Gzip compression of large tarballs is parallelized, using pigz
+        if available or a thread pool otherwise.
+        The tarball is written in the plain ustar format, which needs no extended (PAX) headers for umbfile members.
 
         :param tarpath: path to a tarball file
         :param filename_data: a dictionary filename -> binary string
-        :param compression: compression algorithm one of ("gz", "bz2", "xz") or "" for no compression
+        :param compression: compression algorithm one of ("gz", "bz2", "xz", "zst") or "" for no compression; zstd
+            requires the zstandard package
         """
         logger.debug(f"writing tarfile {tarpath} with compression '{compression}' ...")
-        assert compression in ("", "gz", "bz2", "xz"), "unsupported compression algorithm"
-        mode = "w"
-        if compression != "":
-            mode = f"w:{compression}"
-        with tarfile.open(tarpath, mode=mode) as tar:  # type: ignore
-            for filename, data in filename_data.items():
-                tar_info = tarfile.TarInfo(name=filename)
-                tar_info.size = len(data)
-                tar.addfile(tar_info, std_io.BytesIO(data))
+        assert compression in COMPRESSIONS, "unsupported compression algorithm"
+        for filename, data in filename_data.items():
+            check_ustar_member(filename, len(data))
+        total_size = sum(len(data) for data in filename_data.values())
+        # starting pigz does not pay off for small tarballs
+        pigz = pigz_executable() if compression == "gz" and total_size >= PARALLEL_GZIP_MIN_SIZE else None
+        # the tarball is written next to its destination, which is only replaced once the tarball is complete
+        temppath = temporary_path(tarpath)
+        try:
+            if compression == "zst":
+                cls.tar_write_zstd(temppath, filename_data)
+            elif pigz is not None:
+                cls.tar_write_pigz(temppath, filename_data, pigz)
+            elif compression == "gz" and (os.cpu_count() or 1) > 1 and total_size >= PARALLEL_GZIP_MIN_SIZE:
+                cls.tar_write_gzip_parallel(temppath, filename_data)
+            else:
+                mode = "w"
+                if compression != "":
+                    mode = f"w:{compression}"
+                copybufsize = cls.copy_buffer_size(filename_data)
+                with tarfile.open(temppath, mode=mode, format=tarfile.USTAR_FORMAT, copybufsize=copybufsize) as tar:  # type: ignore
+                    cls.add_members(tar, filename_data)
+        except BaseException:
+            remove_file(temppath)
+            raise
+        os.replace(temppath, tarpath)
         logger.debug("successfully wrote the tarfile")
 
-    def __init__(self):
+    def __init__(self, tarpath: str | None = None, compression: str = "gz"):
+        """
+        :param tarpath: (optional) if provided, files are streamed into this tarball as soon as they are added instead
+            of being kept in memory until write() is called; they are streamed into a temporary file that replaces
+            the tarball once it is finished, so an existing tarball is left untouched until then
+        :param compression: compression algorithm of the tarball, one of ("gz", "bz2", "xz", "zst") or ""
+        """
+        assert compression in COMPRESSIONS, "unsupported compression algorithm"
+        self.compression = compression
         self.filename_data = {}
+        # streaming output
+        self.tarpath = tarpath
+        self.tar: tarfile.TarFile | None = None
+        # sink of the uncompressed tar stream, used instead of a tarfile when the compression happens elsewhere
+        self.stream_out = None
+        self.stream_offset = 0
+        self.tar_info = tarfile.TarInfo()
+        self.pigz_process: subprocess.Popen | None = None
+        # owner of all handles of the streamed tarball (output file, compressor, tarfile or pigz process)
+        self.stream_stack: contextlib.ExitStack | None = None
+        # temporary file into which the tarball is streamed
+        self.stream_temppath: str | None = None
+        self.filenames_written: set[str] = set()
+        if tarpath is not None:
+            self.open_stream(tarpath, compression)
 
-    def add_file(self, filename: str, data: bytes):
+    @property
+    def is_streaming(self) -> bool:
+        """Whether files are streamed into a tarball as soon as they are added."""
+        return self.stream_stack is not None
+
+    def open_stream(self, tarpath: str, compression: str):
+        """
+        Open a tarball for streaming. Gzip compression uses pigz if available. Unless tarfile compresses the stream
+        itself (bz2, xz, or gzip without pigz), files are written directly into the output, without being copied
+        piece by piece.
+        """
+        logger.debug(f"streaming tarfile {tarpath} with compression '{compression}' ...")
+        assert compression in COMPRESSIONS, "unsupported compression algorithm"
+        # the tarball is streamed next to its destination, which is only replaced once the tarball is finished
+        temppath = temporary_path(tarpath)
+        # the size of a streamed tarball is not known in advance, so pigz is used regardless of it
+        pigz = pigz_executable() if compression == "gz" else None
+        try:
+            # if opening fails half-way, the handles opened so far are closed when leaving this block
+            with contextlib.ExitStack() as stack:
+                if compression == "":
+                    self.stream_out = stack.enter_context(open(temppath, "wb"))
+                elif compression == "zst":
+                    require_zstandard()
+                    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+                    tarfile_out = stack.enter_context(open(temppath, "wb"))
+                    # the compressed stream is closed (and its last frame flushed) before the output file
+                    self.stream_out = stack.enter_context(compressor.stream_writer(tarfile_out))
+                elif pigz is None:
+                    mode = f"w|{compression}"
+                    self.tar = stack.enter_context(
+                        tarfile.open(temppath, mode, format=tarfile.USTAR_FORMAT, copybufsize=STREAM_COPY_BUFFER_SIZE)  # type: ignore
+                    )
+                else:
+                    with open(temppath, "wb") as tarfile_out:
+                        # the child process holds its own handle of the output file; leaving the process context
+                        # closes its input and waits for it to finish
+                        self.pigz_process = stack.enter_context(
+                            subprocess.Popen(
+                                [pigz, "-p", str(os.cpu_count() or 1)], stdin=subprocess.PIPE, stdout=tarfile_out
+                            )
+                        )
+                    assert self.pigz_process.stdin is not None
+                    self.stream_out = self.pigz_process.stdin
+                self.stream_stack = stack.pop_all()
+        except BaseException:
+            remove_file(temppath)
+            raise
+        self.stream_temppath = temppath
+
+    def release_stream(self) -> subprocess.Popen | None:
+        """
+        Close all handles of the streamed tarball.
+        :return: the finished pigz process, if the tarball was compressed by pigz
+        """
+        assert self.stream_stack is not None
+        stack, pigz_process = self.stream_stack, self.pigz_process
+        self.stream_stack = None
+        self.stream_temppath = None
+        self.tar = None
+        self.stream_out = None
+        self.pigz_process = None
+        stack.close()
+        return pigz_process
+
+    def close_stream(self):
+        """Finish the streamed tarball."""
+        assert self.is_streaming
+        try:
+            if self.tar is None:
+                self.stream_out.write(TarWriter.end_of_archive(self.stream_offset))
+        except BaseException:
+            self.abort_stream()
+            raise
+        temppath = self.stream_temppath
+        try:
+            pigz_process = self.release_stream()
+            if pigz_process is not None and pigz_process.returncode != 0:
+                raise RuntimeError(f"pigz exited with code {pigz_process.returncode} while writing {self.tarpath}")
+        except BaseException:
+            remove_file(temppath)
+            raise
+        os.replace(temppath, self.tarpath)
+
+    def abort_stream(self):
+        """Stop streaming after an error: close all handles of the tarball and discard it."""
+        if not self.is_streaming:
+            return
+        logger.debug(f"aborting the streamed tarfile {self.tarpath}")
+        temppath = self.stream_temppath
+        try:
+            self.release_stream()
+        finally:
+            remove_file(temppath)
+
+    def add_file(self, filename: str, data: bytes | memoryview):
         """Add a (binary) file to the tarball."""
         logger.debug(f"writing {filename} ...")
+        if self.is_streaming:
+            if filename in self.filenames_written:
+                logger.warning(f"file {filename} already exists in the tarball, appending a newer version")
+            self.filenames_written.add(filename)
+            try:
+                self.stream_file(filename, data)
+            except BaseException:
+                self.abort_stream()
+                raise
+            return
         if filename in self.filename_data:
             logger.warning(f"file {filename} already exists in the tarball, overwriting")
         self.filename_data[filename] = data
 
+    def stream_file(self, filename: str, data: bytes | memoryview):
+        """Write a file into the streamed tarball."""
+        check_ustar_member(filename, len(data))
+        if self.tar is not None:
+            self.tar_info.name = filename
+            self.tar_info.size = len(data)
+            self.tar.addfile(self.tar_info, BufferReader(data))
+            return
+        for piece in TarWriter.member_pieces(self.tar_info, filename, data):
+            self.stream_out.write(piece)
+            self.stream_offset += len(piece)
+
     def add_filetype(
         self,
         filename: str,
@@ -141,25 +655,27 @@ class TarWriter:
         data,
         required: bool = False,
     ):
+        kind, value_type = parse_filetype(filetype)
         if data is None:
             if required:
                 raise ValueError(f"missing required data for {filename}")
             return
         data_out = None
-        if filetype == CommonType.BYTES:
-            data_out = data
-        elif filetype == CommonType.JSON:
+        if kind == FileKind.BYTES:
+            # any contiguous buffer (bytearray, numpy array, mmap, ...) is stored as a flat view of its memory rather
+            # than converted to bytes; the buffer must not be modified until the tarball is written
+            data_out = data if isinstance(data, bytes) else memoryview(data).cast("B").toreadonly()
+        elif kind == FileKind.JSON:
             data_out = umbi.binary.common_value_to_bytes(data, umbi.datatypes.CommonType.JSON)
-        # elif filetype == CSR_TYPE:
-        #     data_out, chunk_csr = umbi.binary.vector_to_bytes(data, CSR_TYPE.base_type)
-        #     assert chunk_csr is None, "unexpected chunk csr"
-        elif isinstance(filetype, VectorType):
-            data_out, chunk_csr = umbi.binary.vector_to_bytes(data, filetype.base_type)
-            assert chunk_csr is None, "exporting the vector requires the CSR file, but no such file was specified"
+        elif filetype == VECTOR_TYPE_CSR:
+            # CSR vectors (and other uint64 vectors) are packed in one pass
+            data_out = umbi.binary.csr_to_buffer(data)
         else:
-            raise ValueError(f"unrecognized file type {filetype} for file {filename}")
+            assert value_type is not None
+            data_out, chunk_csr = umbi.binary.vector_to_buffer(data, value_type)
+            assert chunk_csr is None, "exporting the vector requires the CSR file, but no such file was specified"
         assert data_out is not None, "data is not None, but data_out is None"
-        assert isinstance(data_out, bytes), "data_out must be of type bytes"
+        assert isinstance(data_out, (bytes, memoryview)), "data_out must be a binary string"
         self.add_file(filename, data_out)
 
     def add_filetype_with_csr(
@@ -174,7 +690,7 @@ class TarWriter:
             if required:
                 raise ValueError(f"missing required data for {filename}")
             return
-        data_out, chunk_csr = umbi.binary.vector_to_bytes(data, value_type)
+        data_out, chunk_csr = umbi.binary.vector_to_buffer(data, value_type)
         self.add_file(filename, data_out)
         if chunk_csr is not None:
             self.add_filetype(filename_csr, VECTOR_TYPE_CSR, chunk_csr, required=True)
@@ -182,5 +698,9 @@ class TarWriter:
             logger.debug(f"skipping CSR file {filename_csr}")
 
     def write(self, tarpath: str):
-        """Write all added files to a tarball."""
-        TarWriter.tar_write(tarpath, self.filename_data)
+        """Write all added files to a tarball. If the files were streamed into this tarball, finish it."""
+        if self.is_streaming:
+            assert tarpath == self.tarpath, f"files were streamed into {self.tarpath}, not {tarpath}"
+            self.close_stream()
+            return
+        TarWriter.tar_write(tarpath, self.filename_data, self.compression)
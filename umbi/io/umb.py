@@ -2,11 +2,16 @@
 Utilities for reading and writing umbfiles.
 """
 
+import concurrent.futures
 from enum import Enum
 import logging
-from dataclasses import dataclass, field
+import os
+import threading
+from dataclasses import dataclass, field, fields
 from typing import no_type_check
 
+import numpy as np
+
 import umbi.binary
 import umbi.datatypes
 from umbi.datatypes import (
@@ -23,9 +28,19 @@ from .tar import TarReader, TarWriter
 
 logger = logging.getLogger(__name__)
 
+# maximum number of threads used to read annotations and valuations concurrently
+READ_MAX_WORKERS = 8
+
 
 class UmbFile(Enum):
-    """A list of common files expected in a umbfile. Each entry is a tuple of (filename, filetype)."""
+    """
+    A list of common files expected in a umbfile. Each entry is a tuple of (filename, filetype), also available as the
+    attributes filename and filetype.
+    """
+
+    def __init__(self, filename: str, filetype: CommonType | VectorType):
+        self.filename = filename
+        self.filetype = filetype
 
     INDEX_JSON = ("index.json", CommonType.JSON)
 
@@ -65,6 +80,24 @@ class UmbFile(Enum):
     BRANCH_TO_OBSERVATION = ("branch-to-observation.bin", VectorType(CommonType.UINT64))
 
 
+# kind of items observations apply to -> file with the observations of these items
+OBSERVATION_FILES = {
+    "states": UmbFile.STATE_TO_OBSERVATION,
+    "choices": UmbFile.CHOICE_TO_OBSERVATION,
+    "branches": UmbFile.BRANCH_TO_OBSERVATION,
+}
+
+
+def annotation_files(label: str, name: str, applies: str) -> tuple[str, str]:
+    """
+    Files of the values of an annotation for a single kind of items, resolved once per (annotation, kind) pair.
+    :return: filename of the values
+    :return: filename of the accompanying CSR
+    """
+    path = f"annotations/{label}/{name}/for-{applies}"
+    return f"{path}/values.bin", f"{path}/to-values.bin"
+
+
 @dataclass
 class ExplicitUmb:
     """Class for an explicit representation of a umbfile. The goal of this class is to have all the data is stored in python lists, rather than binary formats."""
@@ -98,32 +131,65 @@ class ExplicitUmb:
         self.index.validate()
 
 
+# fields of ExplicitUmb that are read from files other than the index
+EXPLICIT_UMB_LAZY_FIELDS = [f.name for f in fields(ExplicitUmb) if f.name != "index"]
+# fields of ExplicitUmb that hold annotations
+ANNOTATION_FIELDS = ["rewards", "aps"]
+# fields of ExplicitUmb that are read as they are from a single file
+COMMON_FIELD_FILES = {
+    "state_to_choice": UmbFile.STATE_TO_CHOICE,
+    "state_to_player": UmbFile.STATE_TO_PLAYER,
+    "choice_to_branch": UmbFile.CHOICE_TO_BRANCH,
+    "branch_to_target": UmbFile.BRANCH_TO_TARGET,
+    "choice_to_action": UmbFile.CHOICE_TO_ACTION,
+    "branch_to_branch_action": UmbFile.BRANCH_TO_BRANCH_ACTION,
+}
+# fields of ExplicitUmb holding strings -> (file with the strings, file with their CSR)
+STRING_FIELD_FILES = {
+    "action_to_string": (UmbFile.ACTION_TO_STRING, UmbFile.ACTION_TO_STRING_CSR),
+    "branch_action_to_string": (UmbFile.BRANCH_ACTION_TO_STRING, UmbFile.BRANCH_ACTION_TO_STRING_CSR),
+}
+
+
 class UmbReader(TarReader):
-    def __init__(self, tarpath: str):
+    def __init__(self, tarpath: str, evict: bool = False):
+        """
+        :param evict: if True, release the contents of each file from memory once it has been read
+        """
         super().__init__(tarpath)
         # to keep track of which files were read
-        self.filename_read = {filename: False for filename in self.filenames}
+        self.filenames_unread = set(self.filenames)
+        # files present in the umbfile, including those that were already read (and possibly evicted)
+        self.filenames_present = frozenset(self.filenames)
+        self.evict = evict
+
+    def has(self, file: UmbFile) -> bool:
+        """Check whether the umbfile contains a specific file."""
+        return file.filename in self.filenames_present
 
     def list_unread_files(self):
         """Print warning about unread files from the tarfile, if such exist."""
-        unread_files = [f for f, read in self.filename_read.items() if not read]
+        if len(self.filenames_unread) == 0:
+            return
+        unread_files = [f for f in self.filenames if f in self.filenames_unread]
         for f in unread_files:
             logger.warning(f"umbfile contains unrecognized file: {f}")
 
-    def read_file(self, filename: str, required: bool = False) -> bytes | None:
+    def read_file(self, filename: str, required: bool = False, evict: bool = False) -> bytes | memoryview | None:
         """Read raw bytes from a specific file in the tarball. Mark the file as read."""
-        if filename in self.filenames:
-            self.filename_read[filename] = True
-        return super().read_file(filename, required)
+        self.filenames_unread.discard(filename)
+        return super().read_file(filename, required, evict or self.evict)
 
     def read_common(self, file: UmbFile, required: bool = False):
-        filename, filetype = file.value
-        return self.read_filetype(filename, filetype, required)
+        if not required and not self.has(file):
+            return None
+        return self.read_filetype(file.filename, file.filetype, required)
 
-    def truncate_bitvector(self, vector: list, num_entries: int) -> list:
-        """Truncate a bitvector to num_entries if its length exceeds this number."""
+    def truncate_bitvector(self, vector: list | np.ndarray, num_entries: int) -> list | np.ndarray:
+        """Truncate a bitvector to num_entries if its length exceeds this number. Arrays are truncated to a view."""
         if len(vector) > num_entries:
-            if any(vector[num_entries:]):
+            tail = vector[num_entries:]
+            if tail.any() if isinstance(tail, np.ndarray) else any(tail):
                 logger.warning(
                     f"bitvector {len(vector)} exceeds expected length of {num_entries}, truncating and discarding non-False entries"
                 )
@@ -132,11 +198,13 @@ class UmbReader(TarReader):
 
     def read_common_bitvector(self, file: UmbFile, num_entries: int, required: bool = False) -> list[bool] | None:
         """Read a bitvector and truncate it to num_entries if necessary."""
-        vector = self.read_common(file, required)
-        if vector is None:
+        assert file.filetype == VectorType(CommonType.BOOLEAN), "expected a bitvector file"
+        data = self.read_file(file.filename, required)
+        if data is None:
             return None
-        assert isinstance(vector, list)
-        return self.truncate_bitvector(vector, num_entries)
+        # truncate the unpacked bits before converting them to python booleans
+        vector = self.truncate_bitvector(umbi.binary.bytes_to_bool_array(data), num_entries)
+        return vector.tolist()
 
     def read_common_csr(
         self,
@@ -146,23 +214,58 @@ class UmbReader(TarReader):
         required_csr: bool = False,
         value_type: CommonType | None = None,
     ):
+        if not required and not self.has(file):
+            return None
         if value_type is None:
-            _, filetype = file.value
-            assert isinstance(filetype, VectorType), "expected VectorType"
-            value_type = filetype.base_type
-        filename, _ = file.value
-        filename_csr, _ = file_csr.value
-        return self.read_filetype_with_csr(filename, value_type, required, filename_csr, required_csr)
+            assert isinstance(file.filetype, VectorType), "expected VectorType"
+            value_type = file.filetype.base_type
+        return self.read_filetype_with_csr(file.filename, value_type, required, file_csr.filename, required_csr)
 
     def read_json(self, file: UmbFile) -> UmbIndex:
         json_obj = self.read_common(file, required=True)
-        pretty_str = umbi.datatypes.json_to_string(json_obj)
-        logger.debug(f"loaded the following json:\n{pretty_str}")
-        assert umbi.datatypes.is_json_instance(json_obj), "expected json object"
+        if logger.isEnabledFor(logging.DEBUG):
+            pretty_str = umbi.datatypes.json_to_string(json_obj)
+            logger.debug(f"loaded the following json:\n{pretty_str}")
+        # the json parser only produces json objects, so only the top level is checked instead of walking the whole tree
+        assert isinstance(json_obj, dict), "expected json object"
         idx = UmbIndex.from_json(json_obj)
         idx.validate()
         return idx
 
+    @staticmethod
+    def annotation_value_type(annotation: Annotation) -> CommonType:
+        """Type of the values of an annotation; annotations without a type are boolean."""
+        return CommonType(annotation.type) if annotation.type is not None else CommonType.BOOLEAN
+
+    @staticmethod
+    def annotation_applies_to(annotation: Annotation) -> list[str]:
+        """Kinds of items an annotation applies to; annotations without this information apply to states."""
+        return annotation.applies_to if annotation.applies_to is not None else ["states"]
+
+    @staticmethod
+    def num_items(index: UmbIndex) -> dict[str, int]:
+        """Number of items of each kind that annotations can apply to."""
+        ts = index.transition_system
+        return {"states": ts.num_states, "choices": ts.num_choices, "branches": ts.num_branches}
+
+    def read_annotation_values(
+        self, label: str, name: str, applies: str, annotation_type: CommonType, num_entries: int
+    ) -> list:
+        """
+        Read the values of a single annotation for a single kind of items.
+        :param applies: kind of items, one of ["states","choices","branches"]
+        :param annotation_type: type of the annotation values
+        :param num_entries: number of items of this kind, to which boolean annotations are truncated
+        """
+        filename, filename_csr = annotation_files(label, name, applies)
+        if annotation_type == CommonType.BOOLEAN:
+            data = self.read_file(filename, required=True)
+            assert data is not None
+            # truncate the unpacked bits before converting them to python booleans
+            vector = self.truncate_bitvector(umbi.binary.bytes_to_bool_array(data), num_entries=num_entries)
+            return vector.tolist()
+        return self.read_filetype_with_csr(filename, annotation_type, required=True, filename_csr=filename_csr)
+
     def read_annotation(self, label: str, name: str, annotation: Annotation, index: UmbIndex) -> dict[str, list]:
         """
         Read annotation files for a single annotation.
@@ -171,42 +274,55 @@ class UmbReader(TarReader):
         :param annotation: annotation info (Annotation)
         :return: dict mapping applies_to -> values
         """
-        applies_values = dict()
-        applies_to = annotation.applies_to if annotation.applies_to is not None else ["states"]
-        for applies in applies_to:
-            path = f"annotations/{label}/{name}/for-{applies}"
-            annotation_type = CommonType(annotation.type) if annotation.type is not None else CommonType.BOOLEAN
-            vector = self.read_filetype_with_csr(
-                f"{path}/values.bin",
-                annotation_type,
-                required=True,
-                filename_csr=f"{path}/to-values.bin",
-            )
-            assert isinstance(vector, list)
-            if annotation_type == CommonType.BOOLEAN:
-                num_entries = {
-                    "states": index.transition_system.num_states,
-                    "choices": index.transition_system.num_choices,
-                    "branches": index.transition_system.num_branches,
-                }[applies]
-                vector = self.truncate_bitvector(vector, num_entries=num_entries)
-            applies_values[applies] = vector
-        return applies_values
+        annotation_type = UmbReader.annotation_value_type(annotation)
+        num_items = UmbReader.num_items(index)
+        return {
+            applies: self.read_annotation_values(label, name, applies, annotation_type, num_items[applies])
+            for applies in UmbReader.annotation_applies_to(annotation)
+        }
 
     def read_annotations(
-        self, label: str, annotation_info: dict[str, Annotation] | None, index: UmbIndex
+        self,
+        label: str,
+        annotation_info: dict[str, Annotation] | None,
+        index: UmbIndex,
+        executor: concurrent.futures.Executor | None = None,
     ) -> dict[str, dict[str, list]] | None:
         """
-        Read annotation files for all annotations in annotation_info.
+        Read annotation files for all annotations in annotation_info. All (annotation, applies_to) pairs are collected
+        up front and decoded as one batch, in index order, which is also the order in which they are written.
         :param label: annotation label, usually one of ["rewards","aps"]
         :param annotation_info: a dictionary annotation name -> annotation
+        :param executor: (optional) executor used to read the annotations concurrently; if not provided, batches of
+            several annotation files are read in a thread pool of their own
         :return: dict mapping annotation name -> applies_to -> values
         """
         if annotation_info is None:
             return None
-        name_applies_values = dict()
+        # resolved once for the whole batch rather than for every annotation
+        num_items = UmbReader.num_items(index)
+        batch: list[tuple[str, str, CommonType]] = []
         for name, annotation in annotation_info.items():
-            name_applies_values[name] = self.read_annotation(label, name, annotation, index)
+            # the value type is shared by all kinds of items the annotation applies to
+            annotation_type = UmbReader.annotation_value_type(annotation)
+            batch.extend((name, applies, annotation_type) for applies in UmbReader.annotation_applies_to(annotation))
+
+        def read_values(item: tuple[str, str, CommonType]) -> list:
+            name, applies, annotation_type = item
+            return self.read_annotation_values(label, name, applies, annotation_type, num_items[applies])
+
+        max_workers = min(READ_MAX_WORKERS, len(batch), os.cpu_count() or 1)
+        if executor is not None:
+            batch_values = executor.map(read_values, batch)
+        elif max_workers > 1:
+            # without a shared executor (e.g. when annotations are accessed lazily), a batch gets a pool of its own
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as batch_executor:
+                batch_values = list(batch_executor.map(read_values, batch))
+        else:
+            batch_values = map(read_values, batch)
+        name_applies_values: dict[str, dict[str, list]] = {name: dict() for name in annotation_info}
+        for (name, applies, _), values in zip(batch, batch_values):
+            name_applies_values[name][applies] = values
         return name_applies_values
 
     def read_observations(self, num_observations: int, observations_apply_to: str | None) -> list[int] | None:
@@ -214,11 +330,7 @@ class UmbReader(TarReader):
             return None
         if observations_apply_to is None:
             raise ValueError("observations_applies_to is required when #num_observations > 0")
-        file = {
-            "states": UmbFile.STATE_TO_OBSERVATION,
-            "choices": UmbFile.CHOICE_TO_OBSERVATION,
-            "branches": UmbFile.BRANCH_TO_OBSERVATION,
-        }[observations_apply_to]
+        file = OBSERVATION_FILES[observations_apply_to]
         return self.read_common(file, required=True)
 
     def read_variable_valuations(
@@ -228,86 +340,167 @@ class UmbReader(TarReader):
         file: UmbFile,
         file_csr: UmbFile,
     ) -> list[dict]:
-        chunks_csr = self.read_common(file_csr, required=False)
-        if chunks_csr is None:
-            chunks_csr = list(range(num_entries + 1))
-        chunks_csr = [x * variable_valuations.alignment for x in chunks_csr]
+        alignment = variable_valuations.alignment
+        if self.has(file_csr):
+            chunks_csr = self.read_csr(file_csr.filename)
+            if alignment != 1:
+                chunks_csr = chunks_csr * np.uint64(alignment)
+        else:
+            # every valuation spans a single alignment unit: the scaled offsets are generated directly
+            chunks_csr = np.arange(0, (num_entries + 1) * alignment, alignment, dtype=np.uint64)
+        # the ranges below are a view of the scaled offsets
         valuations = self.read_common(file, required=True)
-        assert isinstance(valuations, bytes)
         # assert len(valuations) == (chunks_csr[-1]), "state valuations data length does not match expected size"
         ranges = umbi.datatypes.csr_to_ranges(chunks_csr)
         return umbi.binary.bytes_to_vector(valuations, variable_valuations, ranges)
 
     @no_type_check
-    def read_umb(self):  # type: ignore
-        logger.info(f"loading umbfile from {self.tarpath} ...")
-        umb = ExplicitUmb()
-
-        umb.index = self.read_json(UmbFile.INDEX_JSON)
-        ts = umb.index.transition_system
-
-        umb.state_is_initial = self.read_common_bitvector(UmbFile.STATE_IS_INITIAL, ts.num_states, required=True)
-        umb.state_to_choice = self.read_common(UmbFile.STATE_TO_CHOICE)
-        umb.state_to_player = self.read_common(UmbFile.STATE_TO_PLAYER)
-
-        umb.state_is_markovian = self.read_common_bitvector(UmbFile.STATE_IS_MARKOVIAN, ts.num_states, required=False)
-        if umb.index.transition_system.exit_rate_type is not None:
-            umb.state_to_exit_rate = self.read_common_csr(
+    def read_field(self, index: UmbIndex, name: str, executor: concurrent.futures.Executor | None = None):
+        """
+        Read a single field of an ExplicitUmb.
+        :param index: index of the umbfile
+        :param name: name of the ExplicitUmb field
+        :param executor: (optional) executor used to read annotations concurrently
+        """
+        # fields stored in a single file of their own are dispatched through a table rather than the chain below
+        file = COMMON_FIELD_FILES.get(name)
+        if file is not None:
+            return self.read_common(file)
+        string_files = STRING_FIELD_FILES.get(name)
+        if string_files is not None:
+            file, file_csr = string_files
+            return self.read_common_csr(file, required=False, file_csr=file_csr, required_csr=True)
+        ts = index.transition_system
+        if name == "state_is_initial":
+            return self.read_common_bitvector(UmbFile.STATE_IS_INITIAL, ts.num_states, required=True)
+
+        if name == "state_is_markovian":
+            return self.read_common_bitvector(UmbFile.STATE_IS_MARKOVIAN, ts.num_states, required=False)
+        if name == "state_to_exit_rate":
+            if ts.exit_rate_type is None:
+                return None
+            return self.read_common_csr(
                 UmbFile.STATE_TO_EXIT_RATE,
                 required=False,
                 file_csr=UmbFile.STATE_TO_EXIT_RATE_CSR,
                 required_csr=False,
-                value_type=CommonType(umb.index.transition_system.exit_rate_type),
+                value_type=CommonType(ts.exit_rate_type),
             )
 
-        umb.choice_to_branch = self.read_common(UmbFile.CHOICE_TO_BRANCH)
-        umb.branch_to_target = self.read_common(UmbFile.BRANCH_TO_TARGET)
-        if umb.index.transition_system.branch_probability_type is not None:
-            umb.branch_to_probability = self.read_common_csr(
+        if name == "branch_to_probability":
+            if ts.branch_probability_type is None:
+                return None
+            return self.read_common_csr(
                 UmbFile.BRANCH_TO_PROBABILITY,
                 required=False,
                 file_csr=UmbFile.BRANCH_TO_PROBABILITY_CSR,
                 required_csr=False,
-                value_type=CommonType(umb.index.transition_system.branch_probability_type),
+                value_type=CommonType(ts.branch_probability_type),
             )
 
-        umb.choice_to_action = self.read_common(UmbFile.CHOICE_TO_ACTION)
-        umb.action_to_string = self.read_common_csr(
-            UmbFile.ACTION_TO_STRING,
-            required=False,
-            file_csr=UmbFile.ACTION_TO_STRING_CSR,
-            required_csr=True,
-        )
-
-        umb.branch_to_branch_action = self.read_common(UmbFile.BRANCH_TO_BRANCH_ACTION)
-        umb.branch_action_to_string = self.read_common_csr(
-            UmbFile.BRANCH_ACTION_TO_STRING,
-            required=False,
-            file_csr=UmbFile.BRANCH_ACTION_TO_STRING_CSR,
-            required_csr=True,
-        )
-
-        if umb.index.annotations is not None:
-            umb.rewards = self.read_annotations("rewards", umb.index.annotations.rewards, umb.index)
-            umb.aps = self.read_annotations("aps", umb.index.annotations.aps, umb.index)
-        if umb.index.state_valuations is not None:
-            umb.state_to_valuation = self.read_variable_valuations(
-                umb.index.state_valuations,
-                num_entries=umb.index.transition_system.num_states,
+        if name in ANNOTATION_FIELDS:
+            if index.annotations is None:
+                return None
+            return self.read_annotations(name, getattr(index.annotations, name), index, executor)
+        if name == "item_to_observation":
+            return self.read_observations(ts.num_observations, ts.observations_apply_to)
+        if name == "state_to_valuation":
+            if index.state_valuations is None:
+                return None
+            return self.read_variable_valuations(
+                index.state_valuations,
+                num_entries=ts.num_states,
                 file=UmbFile.STATE_TO_VALUATION,
                 file_csr=UmbFile.STATE_TO_VALUATION_CSR,
             )
-        umb.item_to_observation = self.read_observations(ts.num_observations, ts.observations_apply_to)
+        raise ValueError(f"unknown field {name}")
+
+    def read_umb(self) -> ExplicitUmb:
+        logger.info(f"loading umbfile from {self.tarpath} ...")
+        index = self.read_json(UmbFile.INDEX_JSON)
+        name_value = {}
+        # all fields are stored in distinct files, so they can be decoded concurrently; annotations are read from
+        # this thread, which splits them into one task per file
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(READ_MAX_WORKERS, os.cpu_count() or 1)) as executor:
+            name_future = {
+                name: executor.submit(self.read_field, index, name)
+                for name in EXPLICIT_UMB_LAZY_FIELDS
+                if name not in ANNOTATION_FIELDS
+            }
+            for name in ANNOTATION_FIELDS:
+                name_value[name] = self.read_field(index, name, executor)
+            for name, future in name_future.items():
+                name_value[name] = future.result()
+        # the umb is created from the loaded fields, so no default values (e.g. an empty index) are built in vain
+        umb = ExplicitUmb(index=index, **name_value)
 
         self.list_unread_files()
         logger.info("finished loading the umbfile")
         return umb
 
+    def read_umb_lazy(self) -> "LazyExplicitUmb":
+        """Read the index of the umbfile; all other fields are read on first access."""
+        logger.info(f"opening umbfile {self.tarpath} ...")
+        return LazyExplicitUmb(self)
+
+
+class LazyExplicitUmb(ExplicitUmb):
+    """
+    An ExplicitUmb whose fields (except for the index) are read from the umbfile on first access. Callers that only
+    need a part of the transition system thus skip decoding of everything else. Fields can be accessed from multiple
+    threads; each field is read only once.
+    """
+
+    def __init__(self, reader: UmbReader):
+        self.reader = reader
+        self.cache: dict[str, object] = {}
+        # the reader evicts every file it reads, so each field is read under its own lock
+        self.locks = {name: threading.Lock() for name in EXPLICIT_UMB_LAZY_FIELDS}
+        self.index = reader.read_json(UmbFile.INDEX_JSON)
+
+    def __repr__(self) -> str:
+        # unlike the dataclass representation, this one does not read any fields
+        return f"LazyExplicitUmb({self.reader.tarpath!r}, loaded fields: {list(self.cache)})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ExplicitUmb):
+            return NotImplemented
+        return all(getattr(self, f.name) == getattr(other, f.name) for f in fields(ExplicitUmb))
+
+    def load_all(self) -> "LazyExplicitUmb":
+        """Read all fields that have not been accessed yet."""
+        for name in EXPLICIT_UMB_LAZY_FIELDS:
+            getattr(self, name)
+        self.reader.list_unread_files()
+        # every field is cached, so the umbfile is no longer needed
+        self.reader.close()
+        return self
+
+
+def lazy_field(name: str) -> property:
+    """Create a property that reads an ExplicitUmb field on first access and caches it."""
+
+    def getter(self: LazyExplicitUmb):
+        if name not in self.cache:
+            with self.locks[name]:
+                # another thread may have read the field in the meantime
+                if name not in self.cache:
+                    self.cache[name] = self.reader.read_field(self.index, name)
+        return self.cache[name]
+
+    def setter(self: LazyExplicitUmb, value):
+        self.cache[name] = value
+
+    return property(getter, setter)
+
+
+for name in EXPLICIT_UMB_LAZY_FIELDS:
+    setattr(LazyExplicitUmb, name, lazy_field(name))
+
 
 class UmbWriter(TarWriter):
     def add_common(self, file: UmbFile, data, required: bool = False):
-        filename, filetype = file.value
-        self.add_filetype(filename, filetype, data, required=required)
+        self.add_filetype(file.filename, file.filetype, data, required=required)
 
     def add_common_csr(
         self,
@@ -318,12 +511,9 @@ class UmbWriter(TarWriter):
         value_type: CommonType | None = None,
     ):
         if value_type is None:
-            _, filetype = file.value
-            assert isinstance(filetype, VectorType), "expected VectorType"
-            value_type = filetype.base_type
-        filename, _ = file.value
-        filename_csr, _ = file_csr.value
-        self.add_filetype_with_csr(filename, value_type, data, required, filename_csr)
+            assert isinstance(file.filetype, VectorType), "expected VectorType"
+            value_type = file.filetype.base_type
+        self.add_filetype_with_csr(file.filename, value_type, data, required, file_csr.filename)
 
     def add_index(self, file: UmbFile, index: UmbIndex):
         index.validate()
@@ -342,18 +532,10 @@ class UmbWriter(TarWriter):
         :param label: annotation label, usually one of ["rewards","aps"]
         :param annotation_info: a dictionary annotation name -> annotation
         """
+        annotation_type = UmbReader.annotation_value_type(annotation_info)
         for applies, values in applies_values.items():
-            prefix = f"annotations/{label}/{name}/for-{applies}"
-            annotation_type = (
-                CommonType(annotation_info.type) if annotation_info.type is not None else CommonType.BOOLEAN
-            )
-            self.add_filetype_with_csr(
-                f"{prefix}/values.bin",
-                annotation_type,
-                values,
-                required=True,
-                filename_csr=f"{prefix}/to-values.bin",
-            )
+            filename, filename_csr = annotation_files(label, name, applies)
+            self.add_filetype_with_csr(filename, annotation_type, values, required=True, filename_csr=filename_csr)
 
     def add_annotations(
         self,
@@ -373,11 +555,7 @@ class UmbWriter(TarWriter):
             return
         if item_to_observation is None:
             raise ValueError("item_to_observation is required when apply_to is specified")
-        file = {
-            "states": UmbFile.STATE_TO_OBSERVATION,
-            "choices": UmbFile.CHOICE_TO_OBSERVATION,
-            "branches": UmbFile.BRANCH_TO_OBSERVATION,
-        }[apply_to]
+        file = OBSERVATION_FILES[apply_to]
         self.add_common(file, item_to_observation, required=True)
 
     def add_variable_valuations(
@@ -390,11 +568,16 @@ class UmbWriter(TarWriter):
         bytestring, chunk_ranges = umbi.binary.vector_to_bytes(variable_valuations, valuation_type)
         assert chunk_ranges is not None
         self.add_common(file, bytestring)
-        chunk_ranges = [x // valuation_type.alignment for x in chunk_ranges]
+        chunk_ranges = np.asarray(chunk_ranges, dtype=np.uint64)
+        if valuation_type.alignment != 1:
+            chunk_ranges //= np.uint64(valuation_type.alignment)
+        if len(chunk_ranges) == len(variable_valuations) + 1 and chunk_ranges[-1] == len(variable_valuations):
+            # every valuation spans a single alignment unit, which is also assumed by readers if the csr is omitted
+            return
         self.add_common(file_csr, chunk_ranges)
 
-    def write_umb(self, umb: ExplicitUmb, umbpath: str):
-        logger.info(f"writing umbfile to {umbpath} ...")
+    def add_files(self, umb: ExplicitUmb):
+        """Add all files of a umbfile."""
         self.add_index(UmbFile.INDEX_JSON, umb.index)
 
         self.add_common(UmbFile.STATE_IS_INITIAL, umb.state_is_initial, required=True)
@@ -441,15 +624,45 @@ class UmbWriter(TarWriter):
                 file_csr=UmbFile.STATE_TO_VALUATION_CSR,
             )
         self.add_observations(umb.index.transition_system.observations_apply_to, umb.item_to_observation)
+
+    def write_umb(self, umb: ExplicitUmb, umbpath: str):
+        logger.info(f"writing umbfile to {umbpath} ...")
+        try:
+            self.add_files(umb)
+        except BaseException:
+            # do not leave a streamed tarball open
+            self.abort_stream()
+            raise
         self.write(umbpath)
         logger.info("finished writing the umbfile")
 
 
-def read_umb(umbpath: str) -> ExplicitUmb:
-    """Read UMB from a umbfile."""
-    return UmbReader(umbpath).read_umb()
-
-
-def write_umb(umb: ExplicitUmb, umbpath: str):
-    """Write UMB to a umbfile."""
-    UmbWriter().write_umb(umb, umbpath)
+def read_umb(umbpath: str, eager: bool = True) -> ExplicitUmb:
+    """
+    Read UMB from a umbfile.
+    :param eager: if False, only the index is read right away and every other field (e.g. annotations or state
+        valuations) is read on first access, see read_umb_lazy
+    """
+    if not eager:
+        return read_umb_lazy(umbpath)
+    with UmbReader(umbpath, evict=True) as reader:
+        return reader.read_umb()
+
+
+def read_umb_lazy(umbpath: str) -> LazyExplicitUmb:
+    """Open a umbfile and read its index; the remaining data is read on first access."""
+    return UmbReader(umbpath, evict=True).read_umb_lazy()
+
+
+def write_umb(umb: ExplicitUmb, umbpath: str, stream: bool = False, compression: str = "gz"):
+    """
+    Write UMB to a umbfile.
+    :param stream: if True, each file is written to the umbfile as soon as it is serialized, which lowers peak memory
+        usage; otherwise, all files are compressed at once, which allows for parallel compression; either way, the
+        umbfile is written to a temporary file that replaces it once complete, so a umb read lazily from the same
+        umbfile can be written back to it
+    :param compression: compression algorithm, one of ("gz", "bz2", "xz", "zst") or ""; umbfiles of any of these
+        formats can be read
+    """
+    writer = UmbWriter(umbpath, compression) if stream else UmbWriter(compression=compression)
+    writer.write_umb(umb, umbpath)
@@ -7,6 +7,7 @@ from umbi.datatypes import (
     is_numeric_type,
     promote_to_vector_of_numeric,
     StructAttribute,
+    StructBatch,
     StructType,
 )
 
@@ -20,6 +21,16 @@ from .index import (
 )
 from .umb import ExplicitUmb, read_umb, write_umb
 
+# counts of the transition system that are stored under the same name in the index and in an ExplicitAts
+TRANSITION_SYSTEM_COUNTS = (
+    "num_players",
+    "num_states",
+    "num_initial_states",
+    "num_choices",
+    "num_actions",
+    "num_branches",
+)
+
 
 def umbi_file_data() -> FileData:
     return FileData(
@@ -96,20 +107,25 @@ def umb_observations_to_ats_observations(
 
 
 def umb_valuations_to_ats_valuations(
-    valuation_type: StructType, item_to_valuation: list[dict]
+    valuation_type: StructType, item_to_valuation: list[dict] | StructBatch
 ) -> umbi.ats.ItemValuations:
     item_valuations = umbi.ats.ItemValuations()
     for field in valuation_type.fields:
         if isinstance(field, StructAttribute):
             item_valuations.add_variable(variable_name=field.name)
-    variable_name_to_variable = {var.name: var for var in item_valuations.variables}
-    for item, valuation in enumerate(item_to_valuation):
-        variable_value = {variable_name_to_variable[variable_name]: value for variable_name, value in valuation.items()}
-        item_valuations.set_item_valuation(item, variable_value)
+    # transpose the per-item valuations into one column of values per variable; batches are already stored this way
+    for var in item_valuations.variables:
+        if isinstance(item_to_valuation, StructBatch) and var.name in item_to_valuation.columns:
+            values = item_to_valuation.columns[var.name]
+        else:
+            # every valuation must assign every variable
+            values = [valuation[var.name] for valuation in item_to_valuation]
+        item_valuations.set_variable_valuations(var, values)
+    item_valuations.ensure_capacity(len(item_to_valuation))
     return item_valuations
 
 
-def ats_valuations_to_umb_valuations(item_valuations: umbi.ats.ItemValuations) -> tuple[StructType, list[dict]]:
+def ats_valuations_to_umb_valuations(item_valuations: umbi.ats.ItemValuations) -> tuple[StructType, StructBatch]:
     valuation_type = StructType(alignment=1, fields=[])
     # item_valuations.sync_domains() # must have been synced before validation
     # promote to common type
@@ -120,9 +136,9 @@ def ats_valuations_to_umb_valuations(item_valuations: umbi.ats.ItemValuations) -
         values = item_valuations.get_variable_valuations(var).values
         values = promote_to_vector_of_numeric(values, var.type)
         var_values[var] = values
-    item_to_valuation = []
-    for item in range(item_valuations.num_items):
-        item_to_valuation.append({var.name: values[item] for var, values in var_values.items()})
+    # the columns of values are kept as they are; per-item valuations are only materialized when accessed
+    columns = {var.name: values for var, values in var_values.items()}
+    item_to_valuation = StructBatch(columns, item_valuations.num_items)
     return valuation_type, item_to_valuation
 
 
@@ -148,12 +164,8 @@ def explicit_umb_to_explicit_ats(umb: ExplicitUmb) -> umbi.ats.ExplicitAts:
     # load index.transition_system fields into ats
     ts = umb.index.transition_system
     ats.time = umbi.ats.TimeType(ts.time)
-    ats.num_players = ts.num_players
-    ats.num_states = ts.num_states
-    ats.num_initial_states = ts.num_initial_states
-    ats.num_choices = ts.num_choices
-    ats.num_actions = ts.num_actions
-    ats.num_branches = ts.num_branches
+    for name in TRANSITION_SYSTEM_COUNTS:
+        setattr(ats, name, getattr(ts, name))
 
     # load annotations
     if umb.index.annotations is not None:
@@ -252,12 +264,7 @@ def explicit_ats_to_explicit_umb(ats: umbi.ats.ExplicitAts) -> ExplicitUmb:
         # create transition_system from matching fields
         transition_system=TransitionSystem(
             time=ats.time.value,
-            num_players=ats.num_players,
-            num_states=ats.num_states,
-            num_initial_states=ats.num_initial_states,
-            num_choices=ats.num_choices,
-            num_actions=ats.num_actions,
-            num_branches=ats.num_branches,
+            **{name: getattr(ats, name) for name in TRANSITION_SYSTEM_COUNTS},
             num_branch_actions=ats.num_branch_actions,
             num_observations=num_observations,
             observations_apply_to=observations_apply_to,